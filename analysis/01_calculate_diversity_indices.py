@@ -22,13 +22,97 @@ Alesina, A., Devleeschauwer, A., Easterly, W., Kurlat, S., & Wacziarg, R. (2003)
     https://doi.org/10.1023/A:1024471506938
 """
 
+import math
 import pandas as pd
 import numpy as np
 from pathlib import Path
+from scipy.special import xlogy
+
+try:
+    from joblib import Parallel, delayed, effective_n_jobs
+except ImportError:  # joblib is optional; indices are then computed in one process
+    Parallel = None
+
+try:
+    from numba import njit, prange
+except ImportError:  # Numba is optional; the NumPy path gives identical results
+    njit = None
 
 # File paths
 INPUT_FILE = "permits_with_demographics.csv"
-OUTPUT_FILE = "analysis/diversity_indices.csv"
+OUTPUT_FILE = "analysis/diversity_indices_per_deso.parquet"
+
+# Smallest population matrix (areas × groups) worth splitting across worker
+# processes; the two-group DeSO table is far below this
+PARALLEL_MIN_CELLS = 5_000_000
+
+def _group_totals(pop2d):
+    """
+    Row totals of a population matrix, with empty areas set to NaN.
+
+    NaN totals propagate through every index, so areas without residents
+    get NaN instead of a division-by-zero warning.
+
+    Args:
+        pop2d: Array of shape (n_areas, n_groups) with population counts
+
+    Returns:
+        ndarray: Total population per area, NaN where the total is 0
+    """
+    total = pop2d.sum(axis=1)
+    return np.where(total > 0, total, np.nan)
+
+def hhi_vec(pop2d):
+    """
+    Herfindahl-Hirschman Index for every row of a population matrix.
+
+    Formula: HHI = Σ(p_i²)
+
+    Args:
+        pop2d: Array of shape (n_areas, n_groups) with population counts
+
+    Returns:
+        ndarray: HHI per area (range 1/K to 1)
+    """
+    p = pop2d / _group_totals(pop2d)[:, None]
+    return (p * p).sum(axis=1)
+
+def simpson_vec(pop2d):
+    """
+    Simpson Diversity Index for every row of a population matrix.
+
+    Formula: D = 1 - Σ(p_i²) = 1 - HHI
+
+    Args:
+        pop2d: Array of shape (n_areas, n_groups) with population counts
+
+    Returns:
+        ndarray: Simpson index per area (range 0 to 1 - 1/K)
+    """
+    return 1.0 - hhi_vec(pop2d)
+
+def shannon_vec(pop2d):
+    """
+    Shannon Entropy Index for every row of a population matrix.
+
+    Uses the count form H = ln(N) - Σ(n_i × ln(n_i)) / N, which equals
+    -Σ(p_i × ln(p_i)) but needs one log per area instead of one per
+    proportion. xlogy treats 0 × ln(0) as 0.
+
+    Args:
+        pop2d: Array of shape (n_areas, n_groups) with population counts
+
+    Returns:
+        ndarray: Shannon index per area (range 0 to ln(K))
+    """
+    total = _group_totals(pop2d)
+    shannon = np.log(total) - xlogy(pop2d, pop2d).sum(axis=1) / total
+    # Clip rounding noise so homogeneous areas stay exactly 0
+    return np.maximum(shannon, 0.0)
+
+def _as_pop2d(populations):
+    """Convert a {group: count} dict to a single-row population matrix."""
+    return np.asarray(list(populations.values()), dtype=float)[None, :]
 
 def calculate_simpson_index(populations):
     """
@@ -40,7 +124,7 @@ def calculate_simpson_index(populations):
     Higher values indicate more diversity (range 0-1)
 
     Args:
-        populations: Dict or Series with population counts by group
+        populations: Dict with population counts by group
 
     Returns:
         float: Simpson diversity index
@@ -48,14 +132,7 @@ def calculate_simpson_index(populations):
     Reference:
         Simpson (1949). "Measurement of diversity"
     """
-    total = sum(populations.values())
-    if total == 0:
-        return np.nan
-
-    proportions = {k: v/total for k, v in populations.items()}
-    simpson = 1 - sum(p**2 for p in proportions.values())
-
-    return simpson
+    return float(simpson_vec(_as_pop2d(populations))[0])
 
 def calculate_shannon_index(populations):
     """
@@ -67,7 +144,7 @@ def calculate_shannon_index(populations):
     Higher values indicate more diversity
 
     Args:
-        populations: Dict or Series with population counts by group
+        populations: Dict with population counts by group
 
     Returns:
         float: Shannon entropy index
@@ -75,14 +152,7 @@ def calculate_shannon_index(populations):
     Reference:
         Shannon (1948). "A mathematical theory of communication"
     """
-    total = sum(populations.values())
-    if total == 0:
-        return np.nan
-
-    proportions = {k: v/total for k, v in populations.items() if v > 0}
-    shannon = -sum(p * np.log(p) for p in proportions.values())
-
-    return shannon
+    return float(shannon_vec(_as_pop2d(populations))[0])
 
 def calculate_fractionalization(populations):
     """
@@ -93,7 +163,7 @@ def calculate_fractionalization(populations):
      probability that two randomly selected individuals are from different groups)
 
     Args:
-        populations: Dict or Series with population counts by group
+        populations: Dict with population counts by group
 
     Returns:
         float: Fractionalization index
@@ -114,26 +184,19 @@ def calculate_herfindahl_index(populations):
     Often used in economics for market concentration
 
     Args:
-        populations: Dict or Series with population counts by group
+        populations: Dict with population counts by group
 
     Returns:
         float: HHI (range 0-1, or 0-10000 if multiplied by 10000)
     """
-    total = sum(populations.values())
-    if total == 0:
-        return np.nan
-
-    proportions = {k: v/total for k, v in populations.items()}
-    hhi = sum(p**2 for p in proportions.values())
-
-    return hhi
+    return float(hhi_vec(_as_pop2d(populations))[0])
 
 def calculate_all_indices(row, swedish_col='inrikes_fodda', foreign_col='utrikes_fodda'):
     """
     Calculate all diversity indices for a DeSO area.
 
     Assumes data has Swedish-born and foreign-born populations.
-    For more detailed analysis, would need breakdown by specific countries.
+    For a breakdown by more groups, use calculate_all_indices_batch.
 
     Args:
         row: DataFrame row with population columns
@@ -143,24 +206,155 @@ def calculate_all_indices(row, swedish_col='inrikes_fodda', foreign_col='utrikes
     Returns:
         dict: All calculated indices
     """
-    populations = {
-        'swedish_born': row[swedish_col],
-        'foreign_born': row[foreign_col]
-    }
+    swedish = float(row[swedish_col])
+    foreign = float(row[foreign_col])
+    total = swedish + foreign
+
+    if total <= 0:
+        return {key: np.nan for key in
+                ['simpson_index', 'shannon_index', 'fractionalization', 'hhi', 'foreign_born_pct']}
+
+    # Proportions once; every index follows from them
+    p_swedish = swedish / total
+    p_foreign = foreign / total
+    hhi = p_swedish * p_swedish + p_foreign * p_foreign
+    simpson = 1.0 - hhi
 
-    # Calculate indices
     indices = {
-        'simpson_index': calculate_simpson_index(populations),
-        'shannon_index': calculate_shannon_index(populations),
-        'fractionalization': calculate_fractionalization(populations),
-        'hhi': calculate_herfindahl_index(populations),
+        'simpson_index': simpson,
+        'shannon_index': -float(xlogy(p_swedish, p_swedish) + xlogy(p_foreign, p_foreign)),
+        'fractionalization': simpson,  # Same formula as Simpson
+        'hhi': hhi,
         # Also calculate simple proportion
-        'foreign_born_pct': populations['foreign_born'] / (populations['swedish_born'] + populations['foreign_born'])
-                            if (populations['swedish_born'] + populations['foreign_born']) > 0 else np.nan
+        'foreign_born_pct': p_foreign
     }
 
     return indices
 
+def _compute_block(pop2d):
+    """HHI and Shannon index for a block of rows of a population matrix."""
+    return hhi_vec(pop2d), shannon_vec(pop2d)
+
+def _compute_indices(pop2d, n_jobs=-1):
+    """
+    HHI and Shannon index for all rows, split across processes when large.
+
+    Rows are independent, so the matrix is cut into row blocks (about four
+    per worker) and evaluated with joblib. Small or two-group inputs, or a
+    missing joblib install, use a single process.
+
+    Args:
+        pop2d: Array of shape (n_areas, n_groups) with population counts
+        n_jobs: Number of worker processes (-1 = all cores)
+
+    Returns:
+        tuple: (hhi, shannon) arrays of length n_areas
+    """
+    n_rows, n_groups = pop2d.shape
+    if Parallel is None or n_groups <= 2 or pop2d.size < PARALLEL_MIN_CELLS:
+        return _compute_block(pop2d)
+
+    block = max(1, -(-n_rows // (4 * effective_n_jobs(n_jobs))))
+    blocks = Parallel(n_jobs=n_jobs, backend='loky')(
+        delayed(_compute_block)(pop2d[i:i + block]) for i in range(0, n_rows, block)
+    )
+    hhi_blocks, shannon_blocks = zip(*blocks)
+    return np.concatenate(hhi_blocks), np.concatenate(shannon_blocks)
+
+if njit is not None:
+    # fastmath without 'nnan'/'ninf', so missing counts still yield NaN
+    @njit(parallel=True, cache=True,
+          fastmath={'nsz', 'arcp', 'contract', 'afn', 'reassoc'})
+    def _compute_k2(swedish, foreign, simpson_out, shannon_out, hhi_out, pct_out):
+        """Fused single-pass kernel for the two-group (Swedish/foreign-born) case."""
+        for i in prange(swedish.shape[0]):
+            total = swedish[i] + foreign[i]
+            if not total > 0:
+                simpson_out[i] = np.nan
+                shannon_out[i] = np.nan
+                hhi_out[i] = np.nan
+                pct_out[i] = np.nan
+                continue
+
+            p_swedish = swedish[i] / total
+            p_foreign = foreign[i] / total
+            hhi = p_swedish * p_swedish + p_foreign * p_foreign
+
+            shannon = 0.0
+            if p_swedish > 0:
+                shannon -= p_swedish * math.log(p_swedish)
+            if p_foreign > 0:
+                shannon -= p_foreign * math.log(p_foreign)
+
+            simpson_out[i] = 1.0 - hhi
+            shannon_out[i] = abs(shannon)  # 'nsz' can leave -0.0 for homogeneous areas
+            hhi_out[i] = hhi
+            pct_out[i] = p_foreign
+else:
+    _compute_k2 = None
+
+def calculate_two_group_indices(swedish, foreign):
+    """
+    Calculate all indices for the Swedish-born / foreign-born split.
+
+    Uses a fused Numba kernel (one pass, no temporary arrays) when Numba
+    is installed, otherwise the general vectorized functions.
+
+    Args:
+        swedish: Array of Swedish-born population counts per area
+        foreign: Array of foreign-born population counts per area
+
+    Returns:
+        dict: Arrays for simpson_index, shannon_index, fractionalization,
+            hhi and foreign_born_pct
+    """
+    swedish = np.ascontiguousarray(swedish, dtype=float)
+    foreign = np.ascontiguousarray(foreign, dtype=float)
+
+    if _compute_k2 is not None:
+        simpson, shannon, hhi, pct = (np.empty(len(swedish)) for _ in range(4))
+        _compute_k2(swedish, foreign, simpson, shannon, hhi, pct)
+    else:
+        pop2d = np.column_stack([swedish, foreign])
+        hhi, shannon = _compute_indices(pop2d)
+        simpson = 1.0 - hhi
+        pct = foreign / _group_totals(pop2d)
+
+    return {
+        'simpson_index': simpson,
+        'shannon_index': shannon,
+        'fractionalization': simpson,
+        'hhi': hhi,
+        'foreign_born_pct': pct
+    }
+
+def calculate_all_indices_batch(df, group_cols, n_jobs=-1):
+    """
+    Calculate all diversity indices for many areas at once.
+
+    Works for any number of population groups, e.g. a breakdown by
+    country of birth instead of Swedish-born vs. foreign-born.
+
+    Args:
+        df: DataFrame with one row per area
+        group_cols: Column names holding population counts per group
+        n_jobs: Worker processes for large many-group inputs (-1 = all cores)
+
+    Returns:
+        DataFrame: Simpson, Shannon, fractionalization and HHI per area,
+            aligned with df.index
+    """
+    pop2d = df[group_cols].to_numpy(float)
+    hhi, shannon = _compute_indices(pop2d, n_jobs)
+    simpson = 1.0 - hhi
+
+    return pd.DataFrame({
+        'simpson_index': simpson,
+        'shannon_index': shannon,
+        'fractionalization': simpson,
+        'hhi': hhi
+    }, index=df.index, copy=False)
+
 def main():
     """
     Main execution: Calculate diversity indices for all DeSO areas.
@@ -171,47 +365,48 @@ def main():
 
     # Load data
     print(f"\nLoading data from {INPUT_FILE}...")
-    df = pd.read_csv(INPUT_FILE)
 
-    # Check required columns exist
+    # Check required columns exist (header only)
     # ADJUST THESE based on your actual column names from SCB data
     swedish_col = 'inrikes_fodda'  # CHANGE IF NEEDED
     foreign_col = 'utrikes_fodda'  # CHANGE IF NEEDED
 
-    if swedish_col not in df.columns or foreign_col not in df.columns:
+    columns = pd.read_csv(INPUT_FILE, nrows=0).columns
+    if swedish_col not in columns or foreign_col not in columns:
         print(f"\nWARNING: Expected columns '{swedish_col}' and '{foreign_col}' not found!")
-        print(f"Available columns: {list(df.columns)}")
+        print(f"Available columns: {list(columns)}")
         print("\nPlease edit this script and update column names.")
         return
 
+    # Only the DeSO key and population counts are needed. Counts are float32
+    # because permits without demographic data have missing values.
+    df = pd.read_csv(INPUT_FILE, engine='pyarrow',
+                     usecols=['deso', swedish_col, foreign_col],
+                     dtype={swedish_col: 'float32', foreign_col: 'float32'})
+
     print(f"Data loaded: {len(df)} permits")
 
     # Calculate indices for each DeSO area
     print("\nCalculating diversity indices...")
 
-    # Group by DeSO to get unique areas
-    deso_stats = df.groupby('deso').agg({
-        swedish_col: 'first',  # Take first value (should be same for all permits in DeSO)
-        foreign_col: 'first'
-    }).reset_index()
-
-    # Calculate indices
-    indices_list = []
-    for idx, row in deso_stats.iterrows():
-        indices = calculate_all_indices(row, swedish_col, foreign_col)
-        indices['deso'] = row['deso']
-        indices_list.append(indices)
-
-    indices_df = pd.DataFrame(indices_list)
+    # One row per DeSO area (demographics are the same for all permits in a DeSO);
+    # permits without a DeSO code have no area to describe
+    deso_stats = (df[['deso', swedish_col, foreign_col]]
+                  .dropna(subset=['deso'])
+                  .drop_duplicates('deso', keep='first')
+                  .reset_index(drop=True))
 
-    # Merge back to original data
-    df_with_indices = df.merge(indices_df, on='deso', how='left')
+    # Calculate indices for all DeSO areas at once
+    indices = calculate_two_group_indices(deso_stats[swedish_col].to_numpy(),
+                                          deso_stats[foreign_col].to_numpy())
+    indices['deso'] = deso_stats['deso'].to_numpy()
+    indices_df = pd.DataFrame(indices, copy=False)
 
-    # Save result
+    # Save result (one row per DeSO; downstream scripts join onto permits)
     Path(OUTPUT_FILE).parent.mkdir(parents=True, exist_ok=True)
-    df_with_indices.to_csv(OUTPUT_FILE, index=False)
+    indices_df.to_parquet(OUTPUT_FILE, compression='zstd', index=False)
 
-    print(f"\n✓ Saved data with diversity indices to: {OUTPUT_FILE}")
+    print(f"\n✓ Saved diversity indices for {len(indices_df)} DeSO areas to: {OUTPUT_FILE}")
 
     # Print summary statistics
     print("\n" + "=" * 60)
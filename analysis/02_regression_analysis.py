@@ -34,19 +34,61 @@ Cameron, A. C., & Miller, D. L. (2015). A practitioner's guide to cluster-robust
 import pandas as pd
 import numpy as np
 from pathlib import Path
-import statsmodels.api as sm
-import statsmodels.formula.api as smf
-from statsmodels.iolib.summary2 import summary_col
+import warnings
+from deso_indices import attach_diversity_indices, lowercase_columns
+# statsmodels is imported inside the functions that fit models (none yet:
+# run_baseline_models only builds formulas), keeping start-up fast
+
+# Columns carried into the regression frame (controls are matched by keyword)
+REGRESSION_COLUMNS = ['deso', 'municipality', 'simpson_index', 'shannon_index',
+                      'fractionalization', 'hhi', 'foreign_born_pct',
+                      'inrikes_fodda', 'utrikes_fodda']
+CONTROL_KEYWORDS = 'income|edu|tenure|owner'
 
 # File paths
-INPUT_FILE = "analysis/diversity_indices.csv"
+PERMITS_FILE = "permits_with_demographics.csv"
+INDICES_FILE = "analysis/diversity_indices_per_deso.parquet"
 OUTPUT_DIR = "analysis/results"
 
+def numeric_columns(df):
+    """
+    List numeric (non-boolean) columns from the dtypes alone.
+
+    Equivalent to df.select_dtypes(include=[np.number]).columns without
+    building the intermediate filtered DataFrame.
+
+    Args:
+        df: Any DataFrame
+
+    Returns:
+        list: Names of numeric columns
+    """
+    return [col for col, dtype in df.dtypes.items()
+            if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)]
+
+def regression_columns(columns):
+    """
+    Pick the columns used by the regressions from a list of column names.
+
+    Args:
+        columns: Column names (e.g. a CSV header or df.columns)
+
+    Returns:
+        list: Known regression columns plus income/education/tenure controls
+    """
+    columns = pd.Index(columns)
+    keep = [col for col in REGRESSION_COLUMNS if col in columns]
+    keep += [col for col in columns[columns.str.lower().str.contains(CONTROL_KEYWORDS)]
+             if col not in keep]
+    return keep
+
 def prepare_regression_data(df):
     """
     Prepare data for regression analysis.
 
-    Creates necessary variables and handles missing data.
+    Creates necessary variables and handles missing data. Only the columns
+    used by the models are carried over, so permit-level fields are not
+    copied.
 
     Args:
         df: DataFrame with diversity indices and demographics
@@ -54,17 +96,17 @@ def prepare_regression_data(df):
     Returns:
         DataFrame ready for regression analysis
     """
-    # Create copy
-    reg_df = df.copy()
+    # Narrow frame: diversity indices, population counts and controls
+    reg_df = pd.DataFrame({col: df[col] for col in regression_columns(df.columns)})
 
     # Calculate total population
     if 'inrikes_fodda' in df.columns and 'utrikes_fodda' in df.columns:
         reg_df['total_population'] = reg_df['inrikes_fodda'] + reg_df['utrikes_fodda']
 
     # Log transformations for skewed variables (common in economic analysis)
-    # Add small constant to avoid log(0)
+    # log(1 + x) avoids log(0)
     if 'total_population' in reg_df.columns:
-        reg_df['log_population'] = np.log(reg_df['total_population'] + 1)
+        reg_df['log_population'] = np.log1p(reg_df['total_population'].to_numpy())
 
     # Drop rows with missing key variables
     key_vars = ['simpson_index', 'shannon_index', 'foreign_born_pct']
@@ -72,7 +114,7 @@ def prepare_regression_data(df):
 
     return reg_df
 
-def run_baseline_models(df):
+def run_baseline_models(df, col_lower=None):
     """
     Run baseline OLS regression models.
 
@@ -85,6 +127,8 @@ def run_baseline_models(df):
 
     Args:
         df: Prepared regression DataFrame
+        col_lower: Optional {column: lowercase name} mapping shared across
+            helpers; computed from df if not given
 
     Returns:
         dict: Regression results by model specification
@@ -98,12 +142,20 @@ def run_baseline_models(df):
     print("Running Baseline Regression Models")
     print("=" * 60)
 
-    # Check which control variables are available
-    has_population = 'log_population' in df.columns
-    has_income = any('income' in col.lower() for col in df.columns)
-    has_education = any('education' in col.lower() or 'edu' in col.lower() for col in df.columns)
-    has_tenure = any('tenure' in col.lower() or 'owner' in col.lower() for col in df.columns)
-    has_municipality = 'municipality' in df.columns
+    # Check which control variables are available (lowercase names once)
+    cols = df.columns
+    if col_lower is None:
+        col_lower = lowercase_columns(df)
+    lc = cols.map(col_lower)
+    income_cols = cols[lc.str.contains('income')]
+    edu_cols = cols[lc.str.contains('edu')]  # also matches 'education'
+    tenure_cols = cols[lc.str.contains('tenure|owner')]
+
+    has_population = 'log_population' in cols
+    has_income = len(income_cols) > 0
+    has_education = len(edu_cols) > 0
+    has_tenure = len(tenure_cols) > 0
+    has_municipality = 'municipality' in cols
 
     # Model 1: Bivariate (diversity only)
     print("\nModel 1: Bivariate (Simpson Index)")
@@ -126,22 +178,16 @@ def run_baseline_models(df):
     controls_added = []
 
     if has_income:
-        income_cols = [col for col in df.columns if 'income' in col.lower()]
-        if income_cols:
-            model3_formula += f' + {income_cols[0]}'
-            controls_added.append('income')
+        model3_formula += f' + {income_cols[0]}'
+        controls_added.append('income')
 
     if has_education:
-        edu_cols = [col for col in df.columns if 'education' in col.lower() or 'edu' in col.lower()]
-        if edu_cols:
-            model3_formula += f' + {edu_cols[0]}'
-            controls_added.append('education')
+        model3_formula += f' + {edu_cols[0]}'
+        controls_added.append('education')
 
     if has_tenure:
-        tenure_cols = [col for col in df.columns if 'tenure' in col.lower() or 'owner' in col.lower()]
-        if tenure_cols:
-            model3_formula += f' + {tenure_cols[0]}'
-            controls_added.append('tenure')
+        model3_formula += f' + {tenure_cols[0]}'
+        controls_added.append('tenure')
 
     if controls_added:
         model_specs['Model 3 (+ Socioeconomic)'] = model3_formula
@@ -156,7 +202,7 @@ def run_baseline_models(df):
 
     return results
 
-def calculate_correlations(df):
+def calculate_correlations(df, col_lower=None):
     """
     Calculate correlation matrix for key variables.
 
@@ -164,6 +210,8 @@ def calculate_correlations(df):
 
     Args:
         df: Regression DataFrame
+        col_lower: Optional {column: lowercase name} mapping shared across
+            helpers; computed from df if not given
 
     Returns:
         DataFrame: Correlation matrix
@@ -172,8 +220,11 @@ def calculate_correlations(df):
     print("Correlation Matrix - Key Variables")
     print("=" * 60)
 
+    if col_lower is None:
+        col_lower = lowercase_columns(df)
+
     # Select numeric columns related to diversity and demographics
-    numeric_cols = df.select_dtypes(include=[np.number]).columns
+    numeric_cols = numeric_columns(df)
     key_vars = []
 
     # Add diversity indices
@@ -188,12 +239,15 @@ def calculate_correlations(df):
 
     # Add any income/education/tenure variables
     for col in numeric_cols:
-        if any(keyword in col.lower() for keyword in ['income', 'education', 'edu', 'tenure', 'owner']):
+        if any(keyword in col_lower[col] for keyword in ['income', 'education', 'edu', 'tenure', 'owner']):
             if col not in key_vars:
                 key_vars.append(col)
 
     if key_vars:
-        corr_matrix = df[key_vars].corr()
+        # Complete cases only, then one corrcoef over the contiguous block
+        values = df[key_vars].dropna().to_numpy(dtype=float)
+        corr = np.corrcoef(values, rowvar=False)
+        corr_matrix = pd.DataFrame(np.atleast_2d(corr), index=key_vars, columns=key_vars)
         return corr_matrix
     else:
         print("WARNING: No numeric variables found for correlation analysis")
@@ -216,12 +270,20 @@ def create_summary_statistics(df):
     print("=" * 60)
 
     # Select key variables
-    numeric_cols = df.select_dtypes(include=[np.number]).columns
-
-    summary = df[numeric_cols].describe().T
-    summary['N'] = summary['count'].astype(int)
-    summary = summary[['N', 'mean', 'std', 'min', 'max']]
-    summary.columns = ['N', 'Mean', 'Std Dev', 'Min', 'Max']
+    numeric_cols = numeric_columns(df)
+    values = df[numeric_cols].to_numpy(dtype=float, na_value=np.nan)
+
+    # Only the reported moments; describe() would also sort for quartiles.
+    # All-NaN columns yield NaN, as describe() does, without the warning.
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        summary = pd.DataFrame({
+            'N': (~np.isnan(values)).sum(axis=0),
+            'Mean': np.nanmean(values, axis=0),
+            'Std Dev': np.nanstd(values, axis=0, ddof=1),
+            'Min': np.nanmin(values, axis=0),
+            'Max': np.nanmax(values, axis=0)
+        }, index=numeric_cols)
 
     return summary
 
@@ -234,14 +296,17 @@ def main():
     print("=" * 60)
 
     # Load data
-    print(f"\nLoading data from {INPUT_FILE}...")
+    print(f"\nLoading data from {PERMITS_FILE} and {INDICES_FILE}...")
 
-    if not Path(INPUT_FILE).exists():
-        print(f"\nERROR: {INPUT_FILE} not found!")
+    if not Path(INDICES_FILE).exists():
+        print(f"\nERROR: {INDICES_FILE} not found!")
         print("Please run 01_calculate_diversity_indices.py first.")
         return
 
-    df = pd.read_csv(INPUT_FILE)
+    # Read only the permit columns the regressions use
+    permit_cols = regression_columns(pd.read_csv(PERMITS_FILE, nrows=0).columns)
+    permits = pd.read_csv(PERMITS_FILE, engine='pyarrow', usecols=permit_cols)
+    df = attach_diversity_indices(permits, pd.read_parquet(INDICES_FILE))
     print(f"Data loaded: {len(df)} observations")
 
     # Prepare data
@@ -249,34 +314,46 @@ def main():
     reg_df = prepare_regression_data(df)
     print(f"After data preparation: {len(reg_df)} observations")
 
+    # Lowercased column names, shared by the keyword-matching helpers
+    col_lower = lowercase_columns(reg_df)
+
     # Create output directory
-    Path(OUTPUT_DIR).mkdir(parents=True, exist_ok=True)
+    out_dir = Path(OUTPUT_DIR)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    # Descriptives at the DeSO grain: every variable is constant within a
+    # DeSO, so permit-level rows would only weight areas by permit count
+    deso_level = reg_df.drop_duplicates('deso')
+    print(f"DeSO areas for descriptive statistics: {len(deso_level)}")
 
     # Summary statistics
-    summary_stats = create_summary_statistics(reg_df)
+    summary_stats = create_summary_statistics(deso_level)
     print("\n" + str(summary_stats.round(2)))
-    summary_stats.to_csv(f"{OUTPUT_DIR}/summary_statistics.csv")
-    print(f"\nSaved: {OUTPUT_DIR}/summary_statistics.csv")
+    summary_path = out_dir / "summary_statistics.parquet"
+    summary_stats.to_parquet(summary_path, compression='zstd')
+    print(f"\nSaved: {summary_path}")
 
     # Correlation matrix
-    corr_matrix = calculate_correlations(reg_df)
+    corr_matrix = calculate_correlations(deso_level, col_lower)
     if corr_matrix is not None:
         print("\n" + str(corr_matrix.round(3)))
-        corr_matrix.to_csv(f"{OUTPUT_DIR}/correlation_matrix.csv")
-        print(f"\nSaved: {OUTPUT_DIR}/correlation_matrix.csv")
+        corr_path = out_dir / "correlation_matrix.parquet"
+        corr_matrix.to_parquet(corr_path, compression='zstd')
+        print(f"\nSaved: {corr_path}")
 
     # Run regression models
-    results = run_baseline_models(reg_df)
+    results = run_baseline_models(reg_df, col_lower)
 
     # Save model specifications
-    with open(f"{OUTPUT_DIR}/model_specifications.txt", 'w') as f:
+    specs_path = out_dir / "model_specifications.txt"
+    with open(specs_path, 'w') as f:
         f.write("Regression Model Specifications\n")
         f.write("=" * 60 + "\n\n")
         for model_name, formula in results['specifications'].items():
             f.write(f"{model_name}:\n")
             f.write(f"  {formula}\n\n")
 
-    print(f"\nSaved: {OUTPUT_DIR}/model_specifications.txt")
+    print(f"\nSaved: {specs_path}")
 
     print("\n" + "=" * 60)
     print("NEXT STEPS")
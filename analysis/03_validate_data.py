@@ -26,46 +26,102 @@ Cameron, A. C., & Trivedi, P. K. (2013). Regression analysis of count data
     (2nd ed.). Cambridge University Press.
 """
 
-import pandas as pd
-import numpy as np
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import warnings
+from deso_indices import attach_diversity_indices
+
+# pandas, NumPy and pyarrow are imported inside the functions that use them,
+# so a missing input file is reported without paying their import cost
 
 # File paths
-INPUT_FILE = "analysis/diversity_indices.csv"
+PERMITS_FILE = "permits_with_demographics.csv"
+INDICES_FILE = "analysis/diversity_indices_per_deso.parquet"
 OUTPUT_DIR = "analysis/validation"
 
-def check_missing_data(df):
+# Variables screened for outliers (when present and numeric)
+OUTLIER_VARS = ('simpson_index', 'shannon_index', 'foreign_born_pct',
+                'total_population', 'inrikes_fodda', 'utrikes_fodda')
+
+def _emit(buf, out=None):
+    """
+    Print a section's buffered report lines, or hand them to the caller.
+
+    Args:
+        buf: List of report lines
+        out: Optional list to extend instead of printing
+    """
+    if out is None:
+        print('\n'.join(buf))
+    else:
+        out.extend(buf)
+
+def load_permits(filepath):
+    """
+    Read the permits CSV with Arrow's multi-threaded parser.
+
+    DeSO and municipality codes are dictionary-encoded while parsing, so
+    they arrive as pandas Categoricals without a separate conversion pass.
+    Empty cells in string columns are read as missing, as pandas would.
+
+    Args:
+        filepath: Path to the permits CSV
+
+    Returns:
+        DataFrame: Permits with categorical 'deso'/'municipality' columns
+    """
+    import pandas as pd
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+    header = pd.read_csv(filepath, nrows=0).columns
+    area_type = pa.dictionary(pa.int32(), pa.string())
+    column_types = {col: area_type for col in ('deso', 'municipality') if col in header}
+
+    convert_options = pa_csv.ConvertOptions(column_types=column_types,
+                                            strings_can_be_null=True)
+    table = pa_csv.read_csv(filepath, convert_options=convert_options)
+    return table.to_pandas()
+
+def check_missing_data(df, out=None):
     """
     Analyze missing data patterns.
 
     Args:
         df: Input DataFrame
+        out: Optional list to collect the report lines instead of printing
 
     Returns:
         DataFrame: Missing data summary
     """
-    print("\n" + "=" * 60)
-    print("Missing Data Analysis")
-    print("=" * 60)
-
+    import numpy as np
+    import pandas as pd
+    buf = []
+    buf.append("\n" + "=" * 60)
+    buf.append("Missing Data Analysis")
+    buf.append("=" * 60)
+
+    # One pass over the missing-value mask
+    counts = df.isna().to_numpy().sum(axis=0)
+    pct = np.round(counts * (100.0 / len(df)), 2)
+
+    has_missing = counts > 0
     missing = pd.DataFrame({
-        'Column': df.columns,
-        'Missing_Count': df.isnull().sum(),
-        'Missing_Percent': (df.isnull().sum() / len(df) * 100).round(2)
-    })
-
-    missing = missing[missing['Missing_Count'] > 0].sort_values('Missing_Count', ascending=False)
+        'Column': df.columns[has_missing],
+        'Missing_Count': counts[has_missing],
+        'Missing_Percent': pct[has_missing]
+    }).sort_values('Missing_Count', ascending=False)
 
     if len(missing) == 0:
-        print("\n✓ No missing data found!")
+        buf.append("\n✓ No missing data found!")
     else:
-        print("\nColumns with missing data:")
-        print(missing.to_string(index=False))
+        buf.append("\nColumns with missing data:")
+        buf.append(missing.to_string(index=False))
 
+    _emit(buf, out)
     return missing
 
-def analyze_sparsity(df):
+def analyze_sparsity(df, out=None):
     """
     Analyze data sparsity - critical for this study.
 
@@ -74,55 +130,62 @@ def analyze_sparsity(df):
 
     Args:
         df: DataFrame with permits and DeSO linkages
+        out: Optional list to collect the report lines instead of printing
 
     Returns:
         dict: Sparsity statistics and recommendations
     """
-    print("\n" + "=" * 60)
-    print("Data Sparsity Analysis")
-    print("=" * 60)
+    import pandas as pd
+    import numpy as np
+    buf = []
+    buf.append("\n" + "=" * 60)
+    buf.append("Data Sparsity Analysis")
+    buf.append("=" * 60)
 
     results = {}
 
-    # Count permits per DeSO
+    # Count permits per DeSO (integer codes + bincount instead of a string groupby)
     if 'deso' in df.columns:
-        permits_per_deso = df.groupby('deso').size()
+        codes, uniques = pd.factorize(df['deso'], sort=False)
+        counts = np.bincount(codes[codes >= 0])
+        permits_per_deso = pd.Series(counts, index=uniques, name='permits_per_deso')
         results['permits_per_deso'] = permits_per_deso
 
-        total_deso = len(permits_per_deso)
+        total_deso = len(counts)
         total_permits = len(df)
 
-        print(f"\nTotal DeSO areas with permits: {total_deso:,}")
-        print(f"Total permits: {total_permits:,}")
-        print(f"Average permits per DeSO: {total_permits/total_deso:.2f}")
+        buf.append(f"\nTotal DeSO areas with permits: {total_deso:,}")
+        buf.append(f"Total permits: {total_permits:,}")
+        buf.append(f"Average permits per DeSO: {total_permits/total_deso:.2f}")
 
         # Distribution of permits
-        print("\nPermit distribution:")
-        print(f"  Min: {permits_per_deso.min()}")
-        print(f"  Median: {permits_per_deso.median():.1f}")
-        print(f"  Mean: {permits_per_deso.mean():.2f}")
-        print(f"  Max: {permits_per_deso.max()}")
-        print(f"  Std Dev: {permits_per_deso.std():.2f}")
-
-        # Concentration analysis
-        deso_1_permit = (permits_per_deso == 1).sum()
-        deso_2_5_permits = ((permits_per_deso >= 2) & (permits_per_deso <= 5)).sum()
-        deso_6plus_permits = (permits_per_deso >= 6).sum()
-
-        print(f"\nConcentration:")
-        print(f"  DeSO areas with 1 permit: {deso_1_permit} ({deso_1_permit/total_deso*100:.1f}%)")
-        print(f"  DeSO areas with 2-5 permits: {deso_2_5_permits} ({deso_2_5_permits/total_deso*100:.1f}%)")
-        print(f"  DeSO areas with 6+ permits: {deso_6plus_permits} ({deso_6plus_permits/total_deso*100:.1f}%)")
+        buf.append("\nPermit distribution:")
+        buf.append(f"  Min: {counts.min()}")
+        buf.append(f"  Median: {np.median(counts):.1f}")
+        buf.append(f"  Mean: {counts.mean():.2f}")
+        buf.append(f"  Max: {counts.max()}")
+        buf.append(f"  Std Dev: {counts.std(ddof=1):.2f}")
+
+        # Concentration analysis (one histogram of the per-DeSO counts)
+        n_deso_by_count = np.bincount(counts)
+        deso_1_permit = n_deso_by_count[1] if len(n_deso_by_count) > 1 else 0
+        deso_2_5_permits = n_deso_by_count[2:6].sum()
+        deso_6plus_permits = n_deso_by_count[6:].sum()
+
+        buf.append(f"\nConcentration:")
+        buf.append(f"  DeSO areas with 1 permit: {deso_1_permit} ({deso_1_permit/total_deso*100:.1f}%)")
+        buf.append(f"  DeSO areas with 2-5 permits: {deso_2_5_permits} ({deso_2_5_permits/total_deso*100:.1f}%)")
+        buf.append(f"  DeSO areas with 6+ permits: {deso_6plus_permits} ({deso_6plus_permits/total_deso*100:.1f}%)")
 
         # Estimate total DeSO in Sweden (if we had full dataset)
-        print("\n" + "=" * 60)
-        print("Sparsity Problem Assessment")
-        print("=" * 60)
-        print("\nEstimated total DeSO areas in Sweden: ~6,160")
-        print(f"DeSO areas with permits in our data: {total_deso}")
-        print(f"DeSO areas with NO permits: ~{6160 - total_deso:,} (estimated)")
+        buf.append("\n" + "=" * 60)
+        buf.append("Sparsity Problem Assessment")
+        buf.append("=" * 60)
+        buf.append("\nEstimated total DeSO areas in Sweden: ~6,160")
+        buf.append(f"DeSO areas with permits in our data: {total_deso}")
+        buf.append(f"DeSO areas with NO permits: ~{6160 - total_deso:,} (estimated)")
         coverage_pct = (total_deso / 6160) * 100
-        print(f"Coverage: {coverage_pct:.1f}% of all DeSO areas")
+        buf.append(f"Coverage: {coverage_pct:.1f}% of all DeSO areas")
 
         results['sparsity_stats'] = {
             'total_deso_with_permits': total_deso,
@@ -131,6 +194,7 @@ def analyze_sparsity(df):
             'estimated_coverage_pct': coverage_pct
         }
 
+    _emit(buf, out)
     return results
 
 def recommend_aggregation_strategies(sparsity_stats):
@@ -143,19 +207,20 @@ def recommend_aggregation_strategies(sparsity_stats):
     Returns:
         dict: Recommended strategies
     """
-    print("\n" + "=" * 60)
-    print("RECOMMENDED STRATEGIES for Data Sparsity")
-    print("=" * 60)
+    buf = []
+    buf.append("\n" + "=" * 60)
+    buf.append("RECOMMENDED STRATEGIES for Data Sparsity")
+    buf.append("=" * 60)
 
     strategies = {}
 
     # Strategy 1: Municipality aggregation
-    print("\n1. AGGREGATE TO MUNICIPALITY LEVEL")
-    print("   - Sweden has 290 municipalities vs 6,160 DeSO areas")
-    print("   - Each municipality would have ~14 permits on average")
-    print("   - Pro: Better statistical power, meaningful administrative unit")
-    print("   - Con: Loses fine-grained neighborhood variation")
-    print("   - RECOMMENDATION: PRIMARY ANALYSIS")
+    buf.append("\n1. AGGREGATE TO MUNICIPALITY LEVEL")
+    buf.append("   - Sweden has 290 municipalities vs 6,160 DeSO areas")
+    buf.append("   - Each municipality would have ~14 permits on average")
+    buf.append("   - Pro: Better statistical power, meaningful administrative unit")
+    buf.append("   - Con: Loses fine-grained neighborhood variation")
+    buf.append("   - RECOMMENDATION: PRIMARY ANALYSIS")
     strategies['municipality'] = {
         'unit': 'Municipality',
         'n_units': 290,
@@ -164,12 +229,12 @@ def recommend_aggregation_strategies(sparsity_stats):
     }
 
     # Strategy 2: County aggregation
-    print("\n2. AGGREGATE TO COUNTY LEVEL (Län)")
-    print("   - Sweden has 21 counties")
-    print("   - Each county would have ~200 permits on average")
-    print("   - Pro: Excellent statistical power")
-    print("   - Con: Loses local neighborhood effects (too coarse)")
-    print("   - RECOMMENDATION: ROBUSTNESS CHECK")
+    buf.append("\n2. AGGREGATE TO COUNTY LEVEL (Län)")
+    buf.append("   - Sweden has 21 counties")
+    buf.append("   - Each county would have ~200 permits on average")
+    buf.append("   - Pro: Excellent statistical power")
+    buf.append("   - Con: Loses local neighborhood effects (too coarse)")
+    buf.append("   - RECOMMENDATION: ROBUSTNESS CHECK")
     strategies['county'] = {
         'unit': 'County (Län)',
         'n_units': 21,
@@ -178,12 +243,12 @@ def recommend_aggregation_strategies(sparsity_stats):
     }
 
     # Strategy 3: Binary outcome
-    print("\n3. BINARY OUTCOME MODEL")
-    print("   - Dependent variable: Any renovation (1) vs. None (0)")
-    print("   - Use logistic regression instead of OLS")
-    print("   - Pro: Handles zeros naturally, interprets as probability")
-    print("   - Con: Loses information about renovation intensity")
-    print("   - RECOMMENDATION: ALTERNATIVE SPECIFICATION")
+    buf.append("\n3. BINARY OUTCOME MODEL")
+    buf.append("   - Dependent variable: Any renovation (1) vs. None (0)")
+    buf.append("   - Use logistic regression instead of OLS")
+    buf.append("   - Pro: Handles zeros naturally, interprets as probability")
+    buf.append("   - Con: Loses information about renovation intensity")
+    buf.append("   - RECOMMENDATION: ALTERNATIVE SPECIFICATION")
     strategies['binary'] = {
         'model': 'Logistic regression',
         'dependent_var': 'any_renovation (0/1)',
@@ -192,12 +257,12 @@ def recommend_aggregation_strategies(sparsity_stats):
     }
 
     # Strategy 4: Count models
-    print("\n4. COUNT DATA MODELS")
-    print("   - Dependent variable: Number of permits (0, 1, 2, ...)")
-    print("   - Use Poisson or Negative Binomial regression")
-    print("   - Pro: Designed for count data with many zeros")
-    print("   - Con: Requires additional assumptions")
-    print("   - RECOMMENDATION: ALTERNATIVE SPECIFICATION")
+    buf.append("\n4. COUNT DATA MODELS")
+    buf.append("   - Dependent variable: Number of permits (0, 1, 2, ...)")
+    buf.append("   - Use Poisson or Negative Binomial regression")
+    buf.append("   - Pro: Designed for count data with many zeros")
+    buf.append("   - Con: Requires additional assumptions")
+    buf.append("   - RECOMMENDATION: ALTERNATIVE SPECIFICATION")
     strategies['count'] = {
         'models': ['Poisson', 'Negative Binomial', 'Zero-Inflated'],
         'dependent_var': 'permit_count',
@@ -206,122 +271,175 @@ def recommend_aggregation_strategies(sparsity_stats):
     }
 
     # Strategy 5: Focus on urban areas
-    print("\n5. SUBSET TO URBAN AREAS")
-    print("   - Focus on Stockholm, Gothenburg, Malmö regions")
-    print("   - These areas likely have higher permit density")
-    print("   - Pro: Better coverage in areas of interest")
-    print("   - Con: Generalizability to rural areas unclear")
-    print("   - RECOMMENDATION: SENSITIVITY ANALYSIS")
+    buf.append("\n5. SUBSET TO URBAN AREAS")
+    buf.append("   - Focus on Stockholm, Gothenburg, Malmö regions")
+    buf.append("   - These areas likely have higher permit density")
+    buf.append("   - Pro: Better coverage in areas of interest")
+    buf.append("   - Con: Generalizability to rural areas unclear")
+    buf.append("   - RECOMMENDATION: SENSITIVITY ANALYSIS")
     strategies['urban_subset'] = {
         'areas': ['Stockholm', 'Gothenburg', 'Malmö'],
         'recommendation': 'SENSITIVITY ANALYSIS',
         'note': 'Compare results: urban vs. all Sweden'
     }
 
+    print('\n'.join(buf))
     return strategies
 
-def check_geographic_coverage(df):
+def check_geographic_coverage(df, out=None):
     """
     Analyze geographic coverage across Sweden.
 
     Args:
         df: DataFrame with municipality information
+        out: Optional list to collect the report lines instead of printing
 
     Returns:
         DataFrame: Summary by municipality
     """
-    print("\n" + "=" * 60)
-    print("Geographic Coverage Analysis")
-    print("=" * 60)
+    import pandas as pd
+    import numpy as np
+    buf = []
+    buf.append("\n" + "=" * 60)
+    buf.append("Geographic Coverage Analysis")
+    buf.append("=" * 60)
 
     if 'municipality' not in df.columns:
-        print("\nWARNING: 'municipality' column not found")
-        print("Cannot perform geographic coverage analysis")
+        buf.append("\nWARNING: 'municipality' column not found")
+        buf.append("Cannot perform geographic coverage analysis")
+        _emit(buf, out)
         return None
 
-    # Permits by municipality
-    muni_summary = df.groupby('municipality').agg({
-        'permit_id': 'count',
-        'deso': 'nunique'
-    }).rename(columns={
-        'permit_id': 'n_permits',
-        'deso': 'n_deso_areas'
-    })
-
-    muni_summary = muni_summary.sort_values('n_permits', ascending=False)
-
-    print(f"\nTotal municipalities represented: {len(muni_summary)}")
-    print(f"\nTop 10 municipalities by permit count:")
-    print(muni_summary.head(10))
-
-    print(f"\nBottom 10 municipalities by permit count:")
-    print(muni_summary.tail(10))
-
+    # Permits by municipality, from integer codes (no groupby/nunique).
+    # factorize only assigns codes to observed values, so unused categories
+    # of a categorical column never get an empty slot.
+    muni_codes, municipalities = pd.factorize(df['municipality'], sort=False)
+    deso_codes, desos = pd.factorize(df['deso'], sort=False)
+    n_muni = len(municipalities)
+    has_muni = muni_codes >= 0
+
+    counted = has_muni & df['permit_id'].notna().to_numpy()
+    n_permits = np.bincount(muni_codes[counted], minlength=n_muni)
+
+    # Distinct (municipality, DeSO) pairs, counted per municipality
+    paired = has_muni & (deso_codes >= 0)
+    pairs = np.unique(muni_codes[paired].astype(np.int64) * len(desos) + deso_codes[paired])
+    n_deso_areas = np.bincount(pairs // max(len(desos), 1), minlength=n_muni)
+
+    muni_summary = pd.DataFrame({
+        'n_permits': n_permits,
+        'n_deso_areas': n_deso_areas
+    }, index=pd.Index(np.asarray(municipalities), name='municipality'))
+
+    # Top/bottom 10 by partial selection rather than sorting every municipality
+    k = min(10, n_muni)
+    top_idx = np.argpartition(-n_permits, k - 1)[:k] if k else np.empty(0, dtype=np.intp)
+    top_idx = top_idx[np.argsort(-n_permits[top_idx], kind='stable')]
+    bottom_idx = np.argpartition(n_permits, k - 1)[:k] if k else np.empty(0, dtype=np.intp)
+    bottom_idx = bottom_idx[np.argsort(-n_permits[bottom_idx], kind='stable')]
+
+    buf.append(f"\nTotal municipalities represented: {len(muni_summary)}")
+    buf.append(f"\nTop 10 municipalities by permit count:")
+    buf.append(str(muni_summary.iloc[top_idx]))
+
+    buf.append(f"\nBottom 10 municipalities by permit count:")
+    buf.append(str(muni_summary.iloc[bottom_idx]))
+
+    _emit(buf, out)
     return muni_summary
 
-def check_diversity_indices(df):
+def check_diversity_indices(df, out=None):
     """
     Validate diversity index calculations.
 
     Args:
         df: DataFrame with diversity indices
+        out: Optional list to collect the report lines instead of printing
 
     Returns:
         dict: Validation results
     """
-    print("\n" + "=" * 60)
-    print("Diversity Index Validation")
-    print("=" * 60)
+    import numpy as np
+    buf = []
+    buf.append("\n" + "=" * 60)
+    buf.append("Diversity Index Validation")
+    buf.append("=" * 60)
 
     results = {}
+    cols = frozenset(df.columns)
+
+    # Min/max of every index present, in one batched reduction
+    index_cols = [col for col in ('simpson_index', 'shannon_index', 'foreign_born_pct')
+                  if col in cols]
+    ranges = df[index_cols].agg(['min', 'max'])
 
     # Check Simpson index range (should be 0-1)
-    if 'simpson_index' in df.columns:
-        simpson_min = df['simpson_index'].min()
-        simpson_max = df['simpson_index'].max()
-        print(f"\nSimpson Index range: [{simpson_min:.4f}, {simpson_max:.4f}]")
+    if 'simpson_index' in cols:
+        simpson_min, simpson_max = ranges['simpson_index']
+        buf.append(f"\nSimpson Index range: [{simpson_min:.4f}, {simpson_max:.4f}]")
 
         if simpson_min < 0 or simpson_max > 1:
-            print("  ⚠ WARNING: Simpson index outside valid range [0,1]")
+            buf.append("  ⚠ WARNING: Simpson index outside valid range [0,1]")
             results['simpson_valid'] = False
         else:
-            print("  ✓ Simpson index in valid range [0,1]")
+            buf.append("  ✓ Simpson index in valid range [0,1]")
             results['simpson_valid'] = True
 
     # Check Shannon index (should be >= 0)
-    if 'shannon_index' in df.columns:
-        shannon_min = df['shannon_index'].min()
-        shannon_max = df['shannon_index'].max()
-        print(f"\nShannon Index range: [{shannon_min:.4f}, {shannon_max:.4f}]")
+    if 'shannon_index' in cols:
+        shannon_min, shannon_max = ranges['shannon_index']
+        buf.append(f"\nShannon Index range: [{shannon_min:.4f}, {shannon_max:.4f}]")
 
         if shannon_min < 0:
-            print("  ⚠ WARNING: Shannon index has negative values")
+            buf.append("  ⚠ WARNING: Shannon index has negative values")
             results['shannon_valid'] = False
         else:
-            print("  ✓ Shannon index in valid range")
+            buf.append("  ✓ Shannon index in valid range")
             results['shannon_valid'] = True
 
         # For 2 groups, max Shannon is ln(2) ≈ 0.693
-        print(f"  Expected max for 2 groups: {np.log(2):.4f}")
+        buf.append(f"  Expected max for 2 groups: {np.log(2):.4f}")
         if shannon_max > np.log(2) + 0.01:  # Small tolerance
-            print(f"  ⚠ WARNING: Shannon index exceeds theoretical max for 2 groups")
+            buf.append(f"  ⚠ WARNING: Shannon index exceeds theoretical max for 2 groups")
 
     # Check foreign-born percentage
-    if 'foreign_born_pct' in df.columns:
-        fb_min = df['foreign_born_pct'].min()
-        fb_max = df['foreign_born_pct'].max()
-        print(f"\nForeign-born percentage range: [{fb_min:.1%}, {fb_max:.1%}]")
+    if 'foreign_born_pct' in cols:
+        fb_min, fb_max = ranges['foreign_born_pct']
+        buf.append(f"\nForeign-born percentage range: [{fb_min:.1%}, {fb_max:.1%}]")
 
         if fb_min < 0 or fb_max > 1:
-            print("  ⚠ WARNING: Foreign-born percentage outside valid range [0,1]")
+            buf.append("  ⚠ WARNING: Foreign-born percentage outside valid range [0,1]")
             results['foreign_born_valid'] = False
         else:
-            print("  ✓ Foreign-born percentage in valid range [0,100%]")
+            buf.append("  ✓ Foreign-born percentage in valid range [0,100%]")
             results['foreign_born_valid'] = True
 
+    _emit(buf, out)
     return results
 
-def identify_outliers(df):
+def smallest_unique(values, k=10):
+    """
+    Return the k smallest distinct values in ascending order.
+
+    Partially sorts with np.partition instead of sorting every value;
+    falls back to a full np.unique only when the k smallest values
+    contain duplicates.
+
+    Args:
+        values: 1-D array
+        k: Number of distinct values to return
+
+    Returns:
+        ndarray: Up to k smallest distinct values, sorted
+    """
+    import numpy as np
+    if values.size > k:
+        smallest = np.unique(np.partition(values, k - 1)[:k])
+        if smallest.size == k:
+            return smallest
+    return np.unique(values)[:k]
+
+def identify_outliers(df, out=None):
     """
     Identify potential outliers in key variables.
 
@@ -329,37 +447,53 @@ def identify_outliers(df):
 
     Args:
         df: Input DataFrame
+        out: Optional list to collect the report lines instead of printing
 
     Returns:
         dict: Outlier information by variable
     """
-    print("\n" + "=" * 60)
-    print("Outlier Detection (IQR Method)")
-    print("=" * 60)
-
-    numeric_cols = df.select_dtypes(include=[np.number]).columns
-    key_vars = [col for col in ['simpson_index', 'shannon_index', 'foreign_born_pct',
-                                  'total_population', 'inrikes_fodda', 'utrikes_fodda']
-                if col in numeric_cols]
+    import pandas as pd
+    import numpy as np
+    buf = []
+    buf.append("\n" + "=" * 60)
+    buf.append("Outlier Detection (IQR Method)")
+    buf.append("=" * 60)
+
+    # Numeric (non-boolean) columns straight from the dtypes
+    numeric_cols = {col for col, dtype in df.dtypes.items()
+                    if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)}
+    key_vars = [col for col in OUTLIER_VARS if col in numeric_cols]
 
     outlier_info = {}
 
-    for col in key_vars:
-        Q1 = df[col].quantile(0.25)
-        Q3 = df[col].quantile(0.75)
-        IQR = Q3 - Q1
+    if not key_vars:
+        buf.append("\n✓ No outliers detected in key variables")
+        _emit(buf, out)
+        return outlier_info
+
+    # Quartiles and bounds for all key variables in one pass
+    values = df[key_vars].to_numpy(dtype=np.float64)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)  # all-NaN columns
+        Q1, Q3 = np.nanquantile(values, [0.25, 0.75], axis=0)
+    IQR = Q3 - Q1
+    lower = Q1 - 1.5 * IQR
+    upper = Q3 + 1.5 * IQR
 
-        lower_bound = Q1 - 1.5 * IQR
-        upper_bound = Q3 + 1.5 * IQR
+    outlier_mask = (values < lower) | (values > upper)
+    outlier_counts = outlier_mask.sum(axis=0)
 
-        outliers = df[(df[col] < lower_bound) | (df[col] > upper_bound)]
-        n_outliers = len(outliers)
+    for j, col in enumerate(key_vars):
+        lower_bound = lower[j]
+        upper_bound = upper[j]
+
+        n_outliers = int(outlier_counts[j])
 
         if n_outliers > 0:
-            print(f"\n{col}:")
-            print(f"  Outliers detected: {n_outliers} ({n_outliers/len(df)*100:.1f}%)")
-            print(f"  Valid range: [{lower_bound:.2f}, {upper_bound:.2f}]")
-            print(f"  Outlier values: {sorted(outliers[col].unique())[:10]}...")  # Show first 10
+            buf.append(f"\n{col}:")
+            buf.append(f"  Outliers detected: {n_outliers} ({n_outliers/len(df)*100:.1f}%)")
+            buf.append(f"  Valid range: [{lower_bound:.2f}, {upper_bound:.2f}]")
+            buf.append(f"  Outlier values: {smallest_unique(values[outlier_mask[:, j], j]).tolist()}...")
 
             outlier_info[col] = {
                 'n_outliers': n_outliers,
@@ -368,8 +502,9 @@ def identify_outliers(df):
             }
 
     if not outlier_info:
-        print("\n✓ No outliers detected in key variables")
+        buf.append("\n✓ No outliers detected in key variables")
 
+    _emit(buf, out)
     return outlier_info
 
 def main():
@@ -381,27 +516,53 @@ def main():
     print("=" * 60)
 
     # Load data
-    print(f"\nLoading data from {INPUT_FILE}...")
+    print(f"\nLoading data from {PERMITS_FILE} and {INDICES_FILE}...")
 
-    if not Path(INPUT_FILE).exists():
-        print(f"\nERROR: {INPUT_FILE} not found!")
+    if not Path(INDICES_FILE).exists():
+        print(f"\nERROR: {INDICES_FILE} not found!")
         print("Please run 01_calculate_diversity_indices.py first.")
         return
 
-    df = pd.read_csv(INPUT_FILE)
+    if not Path(PERMITS_FILE).exists():
+        print(f"\nERROR: {PERMITS_FILE} not found!")
+        print("Please run scripts/link_permits_to_deso.py first.")
+        return
+
+    # Inputs exist; only now pay for the heavy imports
+    import pandas as pd
+
+    df = attach_diversity_indices(load_permits(PERMITS_FILE), pd.read_parquet(INDICES_FILE))
     print(f"Data loaded: {len(df)} observations, {len(df.columns)} columns")
 
     # Create output directory
-    Path(OUTPUT_DIR).mkdir(parents=True, exist_ok=True)
+    if not os.path.isdir(OUTPUT_DIR):
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-    # Run all validation checks
+    # Run all validation checks. The checks only read df, so they run
+    # concurrently; each collects its own output, printed below in order.
     results = {}
+    checks = {
+        'missing': check_missing_data,
+        'sparsity': analyze_sparsity,
+        'geography': check_geographic_coverage,
+        'diversity_valid': check_diversity_indices,
+        'outliers': identify_outliers,
+    }
+    outputs = {name: [] for name in checks}
+    with ThreadPoolExecutor(max_workers=len(checks)) as executor:
+        futures = {name: executor.submit(check, df, outputs[name])
+                   for name, check in checks.items()}
+
+    def section(name):
+        results[name] = futures[name].result()
+        print('\n'.join(outputs[name]))
+        return results[name]
 
     # 1. Missing data
-    results['missing'] = check_missing_data(df)
+    section('missing')
 
     # 2. CRITICAL: Sparsity analysis
-    results['sparsity'] = analyze_sparsity(df)
+    section('sparsity')
 
     # 3. Aggregation recommendations
     results['strategies'] = recommend_aggregation_strategies(
@@ -409,36 +570,46 @@ def main():
     )
 
     # 4. Geographic coverage
-    results['geography'] = check_geographic_coverage(df)
-    if results['geography'] is not None:
-        results['geography'].to_csv(f"{OUTPUT_DIR}/municipality_summary.csv")
+    if section('geography') is not None:
+        # The saved report lists municipalities by permit count, busiest first
+        results['geography'].sort_values('n_permits', ascending=False, kind='stable').to_csv(
+            f"{OUTPUT_DIR}/municipality_summary.csv")
         print(f"\nSaved: {OUTPUT_DIR}/municipality_summary.csv")
 
     # 5. Diversity indices validation
-    results['diversity_valid'] = check_diversity_indices(df)
+    section('diversity_valid')
 
     # 6. Outlier detection
-    results['outliers'] = identify_outliers(df)
-
-    # Save summary report
-    with open(f"{OUTPUT_DIR}/validation_report.txt", 'w', encoding='utf-8') as f:
-        f.write("DATA VALIDATION REPORT\n")
-        f.write("=" * 60 + "\n\n")
-        f.write(f"Date: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-        f.write(f"Input file: {INPUT_FILE}\n")
-        f.write(f"Total observations: {len(df):,}\n\n")
-
-        f.write("CRITICAL FINDINGS\n")
-        f.write("=" * 60 + "\n\n")
-
-        if results['sparsity'].get('sparsity_stats'):
-            stats = results['sparsity']['sparsity_stats']
-            f.write("Data Sparsity Issue:\n")
-            f.write(f"  - Only {stats['estimated_coverage_pct']:.1f}% of DeSO areas have permits\n")
-            f.write(f"  - Average {stats['avg_permits_per_deso']:.2f} permits per DeSO\n")
-            f.write(f"  - RECOMMENDATION: Aggregate to municipality level for primary analysis\n\n")
-
-        f.write("All validation checks completed. See detailed output above.\n")
+    section('outliers')
+
+    # Save summary report (assembled first, written in one call)
+    report = [
+        "DATA VALIDATION REPORT",
+        "=" * 60 + "\n",
+        f"Date: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')}",
+        f"Input files: {PERMITS_FILE}, {INDICES_FILE}",
+        f"Total observations: {len(df):,}\n",
+        "CRITICAL FINDINGS",
+        "=" * 60 + "\n",
+    ]
+
+    if results['sparsity'].get('sparsity_stats'):
+        stats = results['sparsity']['sparsity_stats']
+        report.append("Data Sparsity Issue:")
+        report.append(f"  - Only {stats['estimated_coverage_pct']:.1f}% of DeSO areas have permits")
+        report.append(f"  - Average {stats['avg_permits_per_deso']:.2f} permits per DeSO")
+        report.append(f"  - RECOMMENDATION: Aggregate to municipality level for primary analysis\n")
+
+    report.append("All validation checks completed. See detailed output above.\n")
+
+    # One encoded payload, written straight to the file descriptor
+    payload = memoryview('\n'.join(report).encode('utf-8'))
+    fd = os.open(f"{OUTPUT_DIR}/validation_report.txt", os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        while payload:
+            payload = payload[os.write(fd, payload):]
+    finally:
+        os.close(fd)
 
     print(f"\nSaved: {OUTPUT_DIR}/validation_report.txt")
 
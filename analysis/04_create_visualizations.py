@@ -20,29 +20,215 @@ Wilke, C. O. (2019). Fundamentals of data visualization. O'Reilly Media.
     https://clauswilke.com/dataviz/
 """
 
+import io
+import os
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
 import pandas as pd
 import numpy as np
 from pathlib import Path
-import matplotlib.pyplot as plt
+import matplotlib as mpl
+mpl.use('Agg')  # batch PNG output; never start a GUI backend (seaborn imports pyplot)
 import matplotlib.patches as mpatches
-from matplotlib.colors import LinearSegmentedColormap
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import LinearSegmentedColormap, Normalize
+from matplotlib.figure import Figure
 import seaborn as sns
-
-# Set style for publication-quality figures
-sns.set_style("whitegrid")
-plt.rcParams['figure.dpi'] = 300
-plt.rcParams['savefig.dpi'] = 300
-plt.rcParams['font.size'] = 10
-plt.rcParams['axes.labelsize'] = 11
-plt.rcParams['axes.titlesize'] = 12
-plt.rcParams['xtick.labelsize'] = 9
-plt.rcParams['ytick.labelsize'] = 9
-plt.rcParams['legend.fontsize'] = 9
+from deso_indices import attach_diversity_indices, lowercase_columns
+
+# Style for publication-quality figures (applied in main via rc_context)
+STYLE_RC = {
+    **sns.axes_style("whitegrid"),
+    'figure.dpi': 300,
+    'savefig.dpi': 300,
+    'font.size': 10,
+    'axes.labelsize': 11,
+    'axes.titlesize': 12,
+    'xtick.labelsize': 9,
+    'ytick.labelsize': 9,
+    'legend.fontsize': 9,
+    # Faster rendering of long lines (e.g. the permit timeline)
+    'path.simplify': True,
+    'path.simplify_threshold': 1.0,
+    'agg.path.chunksize': 10000,
+}
 
 # File paths
-INPUT_FILE = "analysis/diversity_indices.csv"
+PERMITS_FILE = "permits_with_demographics.csv"
+INDICES_FILE = "analysis/diversity_indices_per_deso.parquet"
 OUTPUT_DIR = "analysis/figures"
 
+# savefig options. Drafts use fast PNG compression (zlib dominates save
+# time); set PUBLICATION_OUTPUT for the final, smallest-file pass.
+PUBLICATION_OUTPUT = False
+DRAFT_SAVE_KW = dict(bbox_inches='tight', dpi=300, pil_kwargs={'compress_level': 1})
+PUB_SAVE_KW = dict(bbox_inches='tight', dpi=300, pil_kwargs={'compress_level': 9})
+SAVE_KW = PUB_SAVE_KW if PUBLICATION_OUTPUT else DRAFT_SAVE_KW
+
+# Map extent (approximate Sweden bounds: lon_min, lon_max, lat_min, lat_max).
+# With more points than BINNED_MAP_MIN_POINTS, maps are drawn as a 2-D
+# histogram image on a MAP_BINS grid instead of one marker per permit.
+MAP_EXTENT = (10, 25, 55, 70)
+MAP_BINS = (600, 900)
+BINNED_MAP_MIN_POINTS = 50_000
+
+# Extra variables for the correlation heatmap, matched on lowercase names
+CORRELATION_KEYWORDS = re.compile(r'population|income|education|tenure')
+
+def new_figure(figsize, layout='constrained'):
+    """
+    Create a figure on an Agg canvas, outside pyplot's figure manager.
+
+    Figures created this way are not tracked globally, so they are freed
+    as soon as the plotting function returns.
+
+    Args:
+        figsize: (width, height) in inches
+        layout: Matplotlib layout engine name, or None
+
+    Returns:
+        Figure: New figure
+    """
+    fig = Figure(figsize=figsize, layout=layout)
+    FigureCanvasAgg(fig)
+    return fig
+
+def top_counts(values, k):
+    """
+    Counts of the k most frequent values, largest first.
+
+    Uses an unsorted value_counts and a partial selection rather than
+    sorting the counts of every distinct value.
+
+    Args:
+        values: Series to count
+        k: Number of values to keep
+
+    Returns:
+        Series: Up to k counts indexed by value, in descending order
+    """
+    counts = values.value_counts(sort=False)
+    vals = counts.to_numpy()
+    if len(vals) > k:
+        idx = np.argpartition(-vals, k - 1)[:k]
+    else:
+        idx = np.arange(len(vals))
+    return counts.iloc[idx[np.argsort(-vals[idx], kind='stable')]]
+
+def linear_fit(x, y):
+    """
+    Least-squares slope and intercept of y on x, in closed form.
+
+    Args:
+        x: 1-D array of predictor values
+        y: 1-D array of response values
+
+    Returns:
+        tuple: (slope, intercept)
+    """
+    x_mean = x.mean()
+    y_mean = y.mean()
+    dx = x - x_mean
+    slope = (dx @ (y - y_mean)) / (dx @ dx)
+    return slope, y_mean - slope * x_mean
+
+def column_norm(df, col):
+    """
+    Colour normalization spanning a column's full range.
+
+    Built once per column so every panel coloured by it shares one scale.
+
+    Args:
+        df: Input DataFrame
+        col: Column name
+
+    Returns:
+        Normalize: Normalization from the column minimum to its maximum
+    """
+    return Normalize(vmin=float(df[col].min()), vmax=float(df[col].max()))
+
+def plot_locations(ax, df, color=None, value_col=None, cmap=None, norm=None, **scatter_kw):
+    """
+    Draw permit locations as markers, or as a binned image for large inputs.
+
+    Below BINNED_MAP_MIN_POINTS every permit is a scatter marker. Above
+    it, points are binned with np.histogram2d so drawing cost scales with
+    the grid size rather than the number of permits: cells show the log
+    permit count, or the mean of value_col when it is given.
+
+    Args:
+        ax: Axes to draw on
+        df: DataFrame with 'longitude' and 'latitude' columns
+        color: Marker colour when value_col is not given
+        value_col: Optional column mapped through cmap
+        cmap: Colormap for value_col
+        norm: Optional Normalize for value_col, shared across panels
+        **scatter_kw: Extra arguments for ax.scatter (marker path only)
+
+    Returns:
+        Artist: The scatter collection or image, usable for a colorbar
+    """
+    if len(df) < BINNED_MAP_MIN_POINTS:
+        c = df[value_col].to_numpy(dtype=np.float32) if value_col is not None else color
+        return ax.scatter(df['longitude'], df['latitude'], c=c, cmap=cmap, norm=norm,
+                          **scatter_kw)
+
+    lon = df['longitude'].to_numpy(dtype=np.float64)
+    lat = df['latitude'].to_numpy(dtype=np.float64)
+    keep = np.isfinite(lon) & np.isfinite(lat)
+    if value_col is not None:
+        values = df[value_col].to_numpy(dtype=np.float64)
+        keep &= np.isfinite(values)
+    lon, lat = lon[keep], lat[keep]
+
+    bin_range = [MAP_EXTENT[:2], MAP_EXTENT[2:]]
+    counts = np.histogram2d(lon, lat, bins=MAP_BINS, range=bin_range)[0]
+    empty = counts == 0
+    if value_col is None:
+        grid = np.log1p(counts)
+        cmap = LinearSegmentedColormap.from_list('density', ['white', color])
+    else:
+        sums = np.histogram2d(lon, lat, bins=MAP_BINS, range=bin_range,
+                              weights=values[keep])[0]
+        grid = sums / np.where(empty, 1, counts)
+    grid[empty] = np.nan  # empty cells stay transparent
+
+    return ax.imshow(grid.T, origin='lower', extent=MAP_EXTENT, cmap=cmap, norm=norm,
+                     aspect='auto', interpolation='nearest')
+
+def finite_values(df, col):
+    """
+    Column values as a float array with NaN/inf dropped, in one pass.
+
+    Args:
+        df: Input DataFrame
+        col: Column name
+
+    Returns:
+        ndarray: Finite values of the column
+    """
+    values = df[col].to_numpy(dtype=np.float64)
+    return values[np.isfinite(values)]
+
+def plot_histogram(ax, values, bins, color):
+    """
+    Draw a histogram as a single filled step patch.
+
+    Bins are computed once with np.histogram; ax.stairs then draws one
+    path instead of a Rectangle patch per bin.
+
+    Args:
+        ax: Axes to draw on
+        values: 1-D array without missing values
+        bins: Number of bins
+        color: Fill colour
+    """
+    counts, edges = np.histogram(values, bins=bins)
+    ax.stairs(counts, edges, fill=True, facecolor=color, edgecolor='black',
+              linewidth=1, alpha=0.7)
+
 def plot_diversity_distribution(df):
     """
     Plot distribution of diversity indices.
@@ -57,14 +243,16 @@ def plot_diversity_distribution(df):
     """
     print("\nCreating diversity distribution plots...")
 
-    fig, axes = plt.subplots(1, 3, figsize=(15, 4))
+    fig = new_figure((15, 4))
+    axes = fig.subplots(1, 3)
 
     # Simpson Index
     if 'simpson_index' in df.columns:
-        axes[0].hist(df['simpson_index'].dropna(), bins=30, color='steelblue',
-                     edgecolor='black', alpha=0.7)
-        axes[0].axvline(df['simpson_index'].median(), color='red', linestyle='--',
-                       linewidth=2, label=f'Median: {df["simpson_index"].median():.3f}')
+        simpson = finite_values(df, 'simpson_index')
+        simpson_median = np.median(simpson)
+        plot_histogram(axes[0], simpson, 30, 'steelblue')
+        axes[0].axvline(simpson_median, color='red', linestyle='--',
+                       linewidth=2, label=f'Median: {simpson_median:.3f}')
         axes[0].set_xlabel('Simpson Diversity Index')
         axes[0].set_ylabel('Frequency')
         axes[0].set_title('(A) Simpson Index Distribution')
@@ -73,10 +261,11 @@ def plot_diversity_distribution(df):
 
     # Shannon Index
     if 'shannon_index' in df.columns:
-        axes[1].hist(df['shannon_index'].dropna(), bins=30, color='darkorange',
-                     edgecolor='black', alpha=0.7)
-        axes[1].axvline(df['shannon_index'].median(), color='red', linestyle='--',
-                       linewidth=2, label=f'Median: {df["shannon_index"].median():.3f}')
+        shannon = finite_values(df, 'shannon_index')
+        shannon_median = np.median(shannon)
+        plot_histogram(axes[1], shannon, 30, 'darkorange')
+        axes[1].axvline(shannon_median, color='red', linestyle='--',
+                       linewidth=2, label=f'Median: {shannon_median:.3f}')
         axes[1].set_xlabel('Shannon Entropy Index')
         axes[1].set_ylabel('Frequency')
         axes[1].set_title('(B) Shannon Index Distribution')
@@ -85,20 +274,19 @@ def plot_diversity_distribution(df):
 
     # Foreign-born percentage
     if 'foreign_born_pct' in df.columns:
-        axes[2].hist(df['foreign_born_pct'].dropna() * 100, bins=30, color='forestgreen',
-                     edgecolor='black', alpha=0.7)
-        axes[2].axvline(df['foreign_born_pct'].median() * 100, color='red', linestyle='--',
-                       linewidth=2, label=f'Median: {df["foreign_born_pct"].median()*100:.1f}%')
+        foreign_born = finite_values(df, 'foreign_born_pct') * 100
+        foreign_born_median = np.median(foreign_born)
+        plot_histogram(axes[2], foreign_born, 30, 'forestgreen')
+        axes[2].axvline(foreign_born_median, color='red', linestyle='--',
+                       linewidth=2, label=f'Median: {foreign_born_median:.1f}%')
         axes[2].set_xlabel('Foreign-born Population (%)')
         axes[2].set_ylabel('Frequency')
         axes[2].set_title('(C) Foreign-born % Distribution')
         axes[2].legend()
         axes[2].grid(True, alpha=0.3)
 
-    plt.tight_layout()
     output_path = f"{OUTPUT_DIR}/diversity_distributions.png"
-    plt.savefig(output_path, bbox_inches='tight', dpi=300)
-    plt.close()
+    fig.savefig(output_path, **SAVE_KW)
 
     print(f"  ✓ Saved: {output_path}")
     return output_path
@@ -122,12 +310,13 @@ def plot_geographic_map(df):
         print("  ⚠ WARNING: No coordinate data available")
         return None
 
-    fig, axes = plt.subplots(1, 2, figsize=(14, 10))
+    fig = new_figure((14, 10))
+    axes = fig.subplots(1, 2)
 
     # Map 1: All permits
     ax1 = axes[0]
-    scatter1 = ax1.scatter(df['longitude'], df['latitude'], c='steelblue',
-                          alpha=0.5, s=10, edgecolors='none')
+    plot_locations(ax1, df, color='steelblue',
+                   alpha=0.5, s=10, edgecolors='none', rasterized=True)
     ax1.set_xlabel('Longitude')
     ax1.set_ylabel('Latitude')
     ax1.set_title('(A) Building Permits Across Sweden\n(Past 30 Months)')
@@ -140,16 +329,17 @@ def plot_geographic_map(df):
     # Map 2: Colored by diversity
     ax2 = axes[1]
     if 'simpson_index' in df.columns:
-        scatter2 = ax2.scatter(df['longitude'], df['latitude'],
-                              c=df['simpson_index'], cmap='RdYlGn',
-                              alpha=0.6, s=15, edgecolors='black', linewidth=0.5)
-        cbar = plt.colorbar(scatter2, ax=ax2)
+        scatter2 = plot_locations(ax2, df, value_col='simpson_index', cmap='RdYlGn',
+                                  norm=column_norm(df, 'simpson_index'),
+                                  alpha=0.6, s=15, edgecolors='black', linewidth=0.5,
+                                  rasterized=True)
+        cbar = fig.colorbar(scatter2, ax=ax2)
         cbar.set_label('Simpson Diversity Index\n(Green = More Diverse)', rotation=270,
                       labelpad=20)
         ax2.set_title('(B) Permits Colored by\nNeighborhood Diversity')
     else:
-        ax2.scatter(df['longitude'], df['latitude'], c='coral',
-                   alpha=0.5, s=10, edgecolors='none')
+        plot_locations(ax2, df, color='coral',
+                       alpha=0.5, s=10, edgecolors='none', rasterized=True)
         ax2.set_title('(B) Building Permits\n(Diversity data pending)')
 
     ax2.set_xlabel('Longitude')
@@ -158,10 +348,8 @@ def plot_geographic_map(df):
     ax2.set_xlim(10, 25)
     ax2.set_ylim(55, 70)
 
-    plt.tight_layout()
     output_path = f"{OUTPUT_DIR}/geographic_map.png"
-    plt.savefig(output_path, bbox_inches='tight', dpi=300)
-    plt.close()
+    fig.savefig(output_path, **SAVE_KW)
 
     print(f"  ✓ Saved: {output_path}")
     return output_path
@@ -183,9 +371,10 @@ def plot_permits_by_municipality(df):
         return None
 
     # Count permits by municipality
-    muni_counts = df['municipality'].value_counts().head(20)
+    muni_counts = top_counts(df['municipality'], 20)
 
-    fig, ax = plt.subplots(figsize=(12, 8))
+    fig = new_figure((12, 8))
+    ax = fig.subplots()
 
     bars = ax.barh(range(len(muni_counts)), muni_counts.values, color='steelblue',
                    edgecolor='black', alpha=0.8)
@@ -210,15 +399,13 @@ def plot_permits_by_municipality(df):
     for i, v in enumerate(muni_counts.values):
         ax.text(v + 5, i, str(v), va='center', fontweight='bold')
 
-    plt.tight_layout()
     output_path = f"{OUTPUT_DIR}/permits_by_municipality.png"
-    plt.savefig(output_path, bbox_inches='tight', dpi=300)
-    plt.close()
+    fig.savefig(output_path, **SAVE_KW)
 
     print(f"  ✓ Saved: {output_path}")
     return output_path
 
-def plot_diversity_vs_population(df):
+def plot_diversity_vs_population(df, col_lower=None):
     """
     Scatter plot: Diversity indices vs. population.
 
@@ -226,36 +413,38 @@ def plot_diversity_vs_population(df):
 
     Args:
         df: DataFrame with diversity and population data
+        col_lower: Optional {column: lowercase name} mapping shared across
+            plots; computed from df if not given
 
     Returns:
         str: Path to saved figure
     """
     print("\nCreating diversity vs. population scatter plots...")
 
+    if col_lower is None:
+        col_lower = lowercase_columns(df)
+
     # Check data availability
     has_simpson = 'simpson_index' in df.columns
     has_shannon = 'shannon_index' in df.columns
-    has_population = any('population' in col.lower() for col in df.columns)
+    pop_cols = [col for col in df.columns if 'population' in col_lower[col]]
 
-    if not (has_simpson or has_shannon) or not has_population:
+    if not (has_simpson or has_shannon) or not pop_cols:
         print("  ⚠ WARNING: Missing required data for scatter plots")
         return None
 
     # Get population column
-    pop_cols = [col for col in df.columns if 'population' in col.lower()]
-    if pop_cols:
-        pop_col = pop_cols[0]
-    else:
-        return None
+    pop_col = pop_cols[0]
 
     # Create figure
-    fig, axes = plt.subplots(1, 2, figsize=(14, 5))
+    fig = new_figure((14, 5))
+    axes = fig.subplots(1, 2)
 
     # Simpson vs Population
     if has_simpson:
         ax1 = axes[0]
         ax1.scatter(df[pop_col], df['simpson_index'], alpha=0.5, s=20,
-                   color='steelblue', edgecolors='black', linewidth=0.5)
+                   color='steelblue', edgecolors='black', linewidth=0.5, rasterized=True)
         ax1.set_xlabel('Total Population')
         ax1.set_ylabel('Simpson Diversity Index')
         ax1.set_title('(A) Diversity vs. Population Size')
@@ -264,10 +453,11 @@ def plot_diversity_vs_population(df):
         # Add trend line
         valid_data = df[[pop_col, 'simpson_index']].dropna()
         if len(valid_data) > 10:
-            z = np.polyfit(valid_data[pop_col], valid_data['simpson_index'], 1)
-            p = np.poly1d(z)
-            x_trend = np.linspace(valid_data[pop_col].min(), valid_data[pop_col].max(), 100)
-            ax1.plot(x_trend, p(x_trend), "r--", alpha=0.8, linewidth=2,
+            x = valid_data[pop_col].to_numpy(dtype=np.float64)
+            slope, intercept = linear_fit(x, valid_data['simpson_index'].to_numpy(dtype=np.float64))
+            # A straight line only needs its two end points
+            x_trend = np.array([x.min(), x.max()])
+            ax1.plot(x_trend, slope * x_trend + intercept, "r--", alpha=0.8, linewidth=2,
                     label='Linear trend')
             ax1.legend()
 
@@ -275,7 +465,7 @@ def plot_diversity_vs_population(df):
     if has_shannon:
         ax2 = axes[1]
         ax2.scatter(df[pop_col], df['shannon_index'], alpha=0.5, s=20,
-                   color='darkorange', edgecolors='black', linewidth=0.5)
+                   color='darkorange', edgecolors='black', linewidth=0.5, rasterized=True)
         ax2.set_xlabel('Total Population')
         ax2.set_ylabel('Shannon Entropy Index')
         ax2.set_title('(B) Shannon Index vs. Population Size')
@@ -284,33 +474,37 @@ def plot_diversity_vs_population(df):
         # Add trend line
         valid_data = df[[pop_col, 'shannon_index']].dropna()
         if len(valid_data) > 10:
-            z = np.polyfit(valid_data[pop_col], valid_data['shannon_index'], 1)
-            p = np.poly1d(z)
-            x_trend = np.linspace(valid_data[pop_col].min(), valid_data[pop_col].max(), 100)
-            ax2.plot(x_trend, p(x_trend), "r--", alpha=0.8, linewidth=2,
+            x = valid_data[pop_col].to_numpy(dtype=np.float64)
+            slope, intercept = linear_fit(x, valid_data['shannon_index'].to_numpy(dtype=np.float64))
+            # A straight line only needs its two end points
+            x_trend = np.array([x.min(), x.max()])
+            ax2.plot(x_trend, slope * x_trend + intercept, "r--", alpha=0.8, linewidth=2,
                     label='Linear trend')
             ax2.legend()
 
-    plt.tight_layout()
     output_path = f"{OUTPUT_DIR}/diversity_vs_population.png"
-    plt.savefig(output_path, bbox_inches='tight', dpi=300)
-    plt.close()
+    fig.savefig(output_path, **SAVE_KW)
 
     print(f"  ✓ Saved: {output_path}")
     return output_path
 
-def plot_correlation_heatmap(df):
+def plot_correlation_heatmap(df, col_lower=None):
     """
     Correlation heatmap for key variables.
 
     Args:
         df: DataFrame with all variables
+        col_lower: Optional {column: lowercase name} mapping shared across
+            plots; computed from df if not given
 
     Returns:
         str: Path to saved figure
     """
     print("\nCreating correlation heatmap...")
 
+    if col_lower is None:
+        col_lower = lowercase_columns(df)
+
     # Select numeric columns
     numeric_cols = df.select_dtypes(include=[np.number]).columns
 
@@ -322,7 +516,7 @@ def plot_correlation_heatmap(df):
 
     # Add any population, income, education variables
     for col in numeric_cols:
-        if any(keyword in col.lower() for keyword in ['population', 'income', 'education', 'tenure']):
+        if CORRELATION_KEYWORDS.search(col_lower[col]):
             if col not in key_vars:
                 key_vars.append(col)
 
@@ -330,22 +524,27 @@ def plot_correlation_heatmap(df):
         print("  ⚠ WARNING: Not enough variables for correlation heatmap")
         return None
 
-    # Calculate correlation matrix
-    corr_matrix = df[key_vars].corr()
+    # Correlation matrix from one centred Gram product over complete rows
+    A = df[key_vars].to_numpy(dtype=np.float64)
+    A = A[np.isfinite(A).all(axis=1)]
+    A = A - A.mean(axis=0)
+    cov = A.T @ A
+    std = np.sqrt(np.diag(cov))
+    corr_matrix = pd.DataFrame(cov / np.outer(std, std), index=key_vars, columns=key_vars)
 
     # Create heatmap
-    fig, ax = plt.subplots(figsize=(10, 8))
+    fig = new_figure((10, 8))
+    ax = fig.subplots()
 
-    sns.heatmap(corr_matrix, annot=True, fmt='.3f', cmap='coolwarm', center=0,
+    # Cell annotations dominate rendering time on large matrices
+    sns.heatmap(corr_matrix, annot=len(key_vars) <= 12, fmt='.3f', cmap='coolwarm', center=0,
                 square=True, linewidths=1, cbar_kws={"shrink": 0.8},
                 vmin=-1, vmax=1, ax=ax)
 
     ax.set_title('Correlation Matrix: Key Variables', fontsize=14, fontweight='bold', pad=20)
 
-    plt.tight_layout()
     output_path = f"{OUTPUT_DIR}/correlation_heatmap.png"
-    plt.savefig(output_path, bbox_inches='tight', dpi=300)
-    plt.close()
+    fig.savefig(output_path, **SAVE_KW)
 
     print(f"  ✓ Saved: {output_path}")
     return output_path
@@ -366,18 +565,15 @@ def plot_permit_timeline(df):
         print("  ⚠ WARNING: No publication_date column")
         return None
 
-    # Convert to datetime
-    df_time = df.copy()
-    df_time['publication_date'] = pd.to_datetime(df_time['publication_date'], errors='coerce')
-
-    # Group by month
-    df_time['year_month'] = df_time['publication_date'].dt.to_period('M')
-    monthly_counts = df_time.groupby('year_month').size()
+    # Permits per month, counted straight from the date column (no frame copy)
+    dates = pd.to_datetime(df['publication_date'], errors='coerce')
+    monthly_counts = dates.dt.to_period('M').value_counts(sort=False).sort_index()
 
-    fig, ax = plt.subplots(figsize=(14, 5))
+    fig = new_figure((14, 5))
+    ax = fig.subplots()
 
     # Convert period to timestamp for plotting
-    x_dates = [period.to_timestamp() for period in monthly_counts.index]
+    x_dates = monthly_counts.index.to_timestamp()
     ax.plot(x_dates, monthly_counts.values, marker='o', linewidth=2,
             markersize=5, color='steelblue')
 
@@ -387,12 +583,11 @@ def plot_permit_timeline(df):
     ax.grid(True, alpha=0.3)
 
     # Rotate x-axis labels
-    plt.xticks(rotation=45, ha='right')
+    for label in ax.get_xticklabels():
+        label.set(rotation=45, ha='right')
 
-    plt.tight_layout()
     output_path = f"{OUTPUT_DIR}/permit_timeline.png"
-    plt.savefig(output_path, bbox_inches='tight', dpi=300)
-    plt.close()
+    fig.savefig(output_path, **SAVE_KW)
 
     print(f"  ✓ Saved: {output_path}")
     return output_path
@@ -409,21 +604,22 @@ def create_summary_figure(df):
     """
     print("\nCreating summary figure...")
 
-    fig = plt.figure(figsize=(16, 10))
+    fig = new_figure((16, 10), layout=None)
     gs = fig.add_gridspec(3, 3, hspace=0.3, wspace=0.3)
 
     # Panel A: Map
     ax1 = fig.add_subplot(gs[0:2, 0:2])
     if 'latitude' in df.columns and 'longitude' in df.columns:
         if 'simpson_index' in df.columns:
-            scatter = ax1.scatter(df['longitude'], df['latitude'],
-                                c=df['simpson_index'], cmap='RdYlGn',
-                                alpha=0.6, s=15, edgecolors='black', linewidth=0.5)
-            cbar = plt.colorbar(scatter, ax=ax1)
+            scatter = plot_locations(ax1, df, value_col='simpson_index', cmap='RdYlGn',
+                                     norm=column_norm(df, 'simpson_index'),
+                                     alpha=0.6, s=15, edgecolors='black', linewidth=0.5,
+                                     rasterized=True)
+            cbar = fig.colorbar(scatter, ax=ax1)
             cbar.set_label('Simpson Index', rotation=270, labelpad=15)
         else:
-            ax1.scatter(df['longitude'], df['latitude'], c='steelblue',
-                       alpha=0.5, s=10, edgecolors='none')
+            plot_locations(ax1, df, color='steelblue',
+                           alpha=0.5, s=10, edgecolors='none', rasterized=True)
     ax1.set_xlabel('Longitude')
     ax1.set_ylabel('Latitude')
     ax1.set_title('(A) Geographic Distribution', fontweight='bold')
@@ -432,8 +628,7 @@ def create_summary_figure(df):
     # Panel B: Diversity distribution
     ax2 = fig.add_subplot(gs[0, 2])
     if 'simpson_index' in df.columns:
-        ax2.hist(df['simpson_index'].dropna(), bins=20, color='steelblue',
-                edgecolor='black', alpha=0.7)
+        plot_histogram(ax2, finite_values(df, 'simpson_index'), 20, 'steelblue')
         ax2.set_xlabel('Simpson Index')
         ax2.set_ylabel('Frequency')
         ax2.set_title('(B) Diversity\nDistribution', fontweight='bold')
@@ -442,8 +637,7 @@ def create_summary_figure(df):
     # Panel C: Foreign-born %
     ax3 = fig.add_subplot(gs[1, 2])
     if 'foreign_born_pct' in df.columns:
-        ax3.hist(df['foreign_born_pct'].dropna() * 100, bins=20,
-                color='forestgreen', edgecolor='black', alpha=0.7)
+        plot_histogram(ax3, finite_values(df, 'foreign_born_pct') * 100, 20, 'forestgreen')
         ax3.set_xlabel('Foreign-born %')
         ax3.set_ylabel('Frequency')
         ax3.set_title('(C) Foreign-born\n%', fontweight='bold')
@@ -452,7 +646,7 @@ def create_summary_figure(df):
     # Panel D: Top municipalities
     ax4 = fig.add_subplot(gs[2, :])
     if 'municipality' in df.columns:
-        muni_counts = df['municipality'].value_counts().head(10)
+        muni_counts = top_counts(df['municipality'], 10)
         bars = ax4.barh(range(len(muni_counts)), muni_counts.values,
                        color='steelblue', edgecolor='black', alpha=0.8)
         ax4.set_yticks(range(len(muni_counts)))
@@ -461,16 +655,46 @@ def create_summary_figure(df):
         ax4.set_title('(D) Top 10 Municipalities', fontweight='bold')
         ax4.grid(True, axis='x', alpha=0.3)
 
-    plt.suptitle('Diversity and Renovation Study: Data Overview',
+    fig.suptitle('Diversity and Renovation Study: Data Overview',
                 fontsize=16, fontweight='bold', y=0.995)
 
     output_path = f"{OUTPUT_DIR}/summary_figure.png"
-    plt.savefig(output_path, bbox_inches='tight', dpi=300)
-    plt.close()
+    fig.savefig(output_path, **SAVE_KW)
 
     print(f"  ✓ Saved: {output_path}")
     return output_path
 
+# Per-process state for the plotting workers (set by _init_worker)
+_WORKER = {}
+
+def _init_worker(data_path):
+    """
+    Load the merged data once per worker process.
+
+    Args:
+        data_path: Parquet file holding the merged permit/diversity data
+    """
+    df = pd.read_parquet(data_path)
+    _WORKER['df'] = df
+    _WORKER['col_lower'] = lowercase_columns(df)
+
+def _render_plot(task):
+    """
+    Render one figure in a worker process.
+
+    Args:
+        task: (plot function, whether it takes the col_lower mapping)
+
+    Returns:
+        tuple: (saved figure path or None, text the plot function printed)
+    """
+    plot, takes_col_lower = task
+    args = (_WORKER['df'], _WORKER['col_lower']) if takes_col_lower else (_WORKER['df'],)
+    out = io.StringIO()
+    with redirect_stdout(out), mpl.rc_context(STYLE_RC):
+        fig_path = plot(*args)
+    return fig_path, out.getvalue()
+
 def main():
     """
     Main execution: Create all visualizations.
@@ -480,56 +704,47 @@ def main():
     print("=" * 60)
 
     # Load data
-    print(f"\nLoading data from {INPUT_FILE}...")
+    print(f"\nLoading data from {PERMITS_FILE} and {INDICES_FILE}...")
 
-    if not Path(INPUT_FILE).exists():
-        print(f"\nERROR: {INPUT_FILE} not found!")
+    if not Path(INDICES_FILE).exists():
+        print(f"\nERROR: {INDICES_FILE} not found!")
         print("Please run 01_calculate_diversity_indices.py first.")
         return
 
-    df = pd.read_csv(INPUT_FILE)
+    # Municipality as a categorical: counts run on integer codes, not strings
+    permits = pd.read_csv(PERMITS_FILE, dtype={'municipality': 'category'})
+    df = attach_diversity_indices(permits, pd.read_parquet(INDICES_FILE))
     print(f"Data loaded: {len(df)} observations")
 
     # Create output directory
     Path(OUTPUT_DIR).mkdir(parents=True, exist_ok=True)
 
-    # Create all visualizations
+    # Create all visualizations. The figures are independent, so they are
+    # rendered in worker processes; each worker reads the merged data once
+    # from a temporary Parquet file instead of receiving a pickled frame.
+    tasks = [
+        (plot_diversity_distribution, False),   # 1. Diversity distributions
+        (plot_geographic_map, False),           # 2. Geographic map
+        (plot_permits_by_municipality, False),  # 3. Municipalities
+        (plot_diversity_vs_population, True),   # 4. Diversity vs population
+        (plot_correlation_heatmap, True),       # 5. Correlation heatmap
+        (plot_permit_timeline, False),          # 6. Timeline
+        (create_summary_figure, False),         # 7. Summary figure (comprehensive)
+    ]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_path = os.path.join(tmp_dir, "merged.parquet")
+        df.to_parquet(data_path)
+        n_workers = min(len(tasks), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                 initargs=(data_path,)) as executor:
+            rendered = list(executor.map(_render_plot, tasks))
+
+    # Report in the original order
     figures_created = []
-
-    # 1. Diversity distributions
-    fig_path = plot_diversity_distribution(df)
-    if fig_path:
-        figures_created.append(fig_path)
-
-    # 2. Geographic map
-    fig_path = plot_geographic_map(df)
-    if fig_path:
-        figures_created.append(fig_path)
-
-    # 3. Municipalities
-    fig_path = plot_permits_by_municipality(df)
-    if fig_path:
-        figures_created.append(fig_path)
-
-    # 4. Diversity vs population
-    fig_path = plot_diversity_vs_population(df)
-    if fig_path:
-        figures_created.append(fig_path)
-
-    # 5. Correlation heatmap
-    fig_path = plot_correlation_heatmap(df)
-    if fig_path:
-        figures_created.append(fig_path)
-
-    # 6. Timeline
-    fig_path = plot_permit_timeline(df)
-    if fig_path:
-        figures_created.append(fig_path)
-
-    # 7. Summary figure (comprehensive)
-    fig_path = create_summary_figure(df)
-    if fig_path:
-        figures_created.append(fig_path)
+    for fig_path, output in rendered:
+        print(output, end='')
+        if fig_path:
+            figures_created.append(fig_path)
 
     # Summary
     print("\n" + "=" * 60)
@@ -14,10 +14,25 @@ All models use OLS with no robust standard errors in this implementation.
 For publication-quality standard errors, use statsmodels with robust SE.
 """
 
+import sys
 import pandas as pd
 import numpy as np
 from pathlib import Path
 
+# The Parquet-cache CSV loader is shared with the scripts/ pipeline
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+from csv_cache import read_csv_cached
+
+# File paths
+SUMMARY_CSV = "analysis/municipality_summary.csv"
+
+# Columns used by the Table 4 models (only these are loaded)
+MODEL_COLUMNS = ['permits_per_1000_dwellings', 'simpson_index', 'shannon_index',
+                 'total_population', 'mean_income_sek', 'owner_share']
+
+# Regressors shared by Models 1-4; each model picks its columns by index
+REGRESSORS = ['simpson_index', 'shannon_index', 'log_population', 'income_100k', 'owner_share']
+
 def run_ols(X, y):
     """
     Simple OLS regression: beta = (X'X)^-1 X'y
@@ -27,13 +42,36 @@ def run_ols(X, y):
         r2: R-squared
         n: sample size
     """
-    beta = np.linalg.lstsq(X, y, rcond=None)[0]
-    y_pred = X @ beta
-    ss_res = np.sum((y - y_pred)**2)
+    # Normal equations via Cholesky: X'X is only p x p for these models
+    XtX = X.T @ X
+    Xty = X.T @ y
+    L = np.linalg.cholesky(XtX)
+    beta = np.linalg.solve(L.T, np.linalg.solve(L, Xty))
+    # At the solution, e'e = y'y - beta'X'y (no residual vector needed)
+    ss_res = y @ y - beta @ Xty
     ss_tot = np.sum((y - y.mean())**2)
     r2 = 1 - (ss_res / ss_tot)
     return beta, r2, len(y)
 
+def select_model_data(A, finite_A, y, finite_y, idx):
+    """
+    Complete-case design matrix and outcome for one model.
+
+    Args:
+        A: Regressor array with columns in REGRESSORS order
+        finite_A: np.isfinite(A), computed once for all models
+        y: Dependent variable
+        finite_y: np.isfinite(y), computed once for all models
+        idx: Column indices of A used by the model
+
+    Returns:
+        X: Design matrix (selected regressors, then intercept)
+        y: Dependent variable for the same rows
+    """
+    mask = finite_A[:, idx].all(axis=1) & finite_y
+    X = np.column_stack([A[mask][:, idx], np.ones(mask.sum())])
+    return X, y[mask]
+
 def main():
     print("=" * 70)
     print("REPRODUCING TABLE 4: OLS REGRESSION RESULTS")
@@ -41,15 +79,20 @@ def main():
     print("=" * 70)
 
     # Load data
-    df = pd.read_csv('analysis/municipality_summary.csv')
+    df = read_csv_cached(SUMMARY_CSV, columns=MODEL_COLUMNS)
 
     # Dependent variable
-    y = df['permits_per_1000_dwellings'].values
+    y = df['permits_per_1000_dwellings'].to_numpy(dtype=np.float64)
 
     # Prepare independent variables
     df['log_population'] = np.log(df['total_population'] + 1)
     df['income_100k'] = df['mean_income_sek'] / 100000
 
+    # All regressors as one float64 block, checked for NaN/inf once for every model
+    A = np.ascontiguousarray(df[REGRESSORS].to_numpy(dtype=np.float64))
+    finite_A = np.isfinite(A)
+    finite_y = np.isfinite(y)
+
     results = []
 
     # ==========================================
@@ -58,11 +101,7 @@ def main():
     print("\nMODEL 1: Simpson Index Only")
     print("-" * 70)
 
-    X1 = df[['simpson_index']].copy()
-    X1['intercept'] = 1
-    valid1 = ~X1.isna().any(axis=1) & ~np.isnan(y)
-    X1_clean = X1[valid1].values
-    y1_clean = y[valid1]
+    X1_clean, y1_clean = select_model_data(A, finite_A, y, finite_y, [0])
 
     beta1, r2_1, n1 = run_ols(X1_clean, y1_clean)
 
@@ -87,11 +126,7 @@ def main():
     print("\nMODEL 2: + Log Population")
     print("-" * 70)
 
-    X2 = df[['simpson_index', 'log_population']].copy()
-    X2['intercept'] = 1
-    valid2 = ~X2.isna().any(axis=1) & ~np.isnan(y)
-    X2_clean = X2[valid2].values
-    y2_clean = y[valid2]
+    X2_clean, y2_clean = select_model_data(A, finite_A, y, finite_y, [0, 2])
 
     beta2, r2_2, n2 = run_ols(X2_clean, y2_clean)
 
@@ -117,11 +152,7 @@ def main():
     print("\nMODEL 3: + Income + Owner Share (MAIN)")
     print("-" * 70)
 
-    X3 = df[['simpson_index', 'log_population', 'income_100k', 'owner_share']].copy()
-    X3['intercept'] = 1
-    valid3 = ~X3.isna().any(axis=1) & ~np.isnan(y)
-    X3_clean = X3[valid3].values
-    y3_clean = y[valid3]
+    X3_clean, y3_clean = select_model_data(A, finite_A, y, finite_y, [0, 2, 3, 4])
 
     beta3, r2_3, n3 = run_ols(X3_clean, y3_clean)
 
@@ -149,11 +180,7 @@ def main():
     print("\nMODEL 4: Shannon Entropy (Alternative Measure)")
     print("-" * 70)
 
-    X4 = df[['shannon_index', 'log_population', 'income_100k', 'owner_share']].copy()
-    X4['intercept'] = 1
-    valid4 = ~X4.isna().any(axis=1) & ~np.isnan(y)
-    X4_clean = X4[valid4].values
-    y4_clean = y[valid4]
+    X4_clean, y4_clean = select_model_data(A, finite_A, y, finite_y, [1, 2, 3, 4])
 
     beta4, r2_4, n4 = run_ols(X4_clean, y4_clean)
 
@@ -0,0 +1,52 @@
+"""
+Shared helpers for the permit-level analysis scripts (02-04)
+=============================================================
+Scripts 02-04 all join the per-DeSO diversity indices written by
+01_calculate_diversity_indices.py onto the permit rows; they import the join
+from here so every script broadcasts the indices the same way.
+
+pandas and NumPy are imported inside the functions, so importing this module
+stays cheap for scripts that report a missing input file before loading data.
+"""
+
+def attach_diversity_indices(df, indices_df):
+    """
+    Broadcast per-DeSO diversity indices onto permit rows.
+
+    Each DeSO is looked up once and broadcast by integer code. Permits
+    without a DeSO code, or with a DeSO missing from indices_df, get NaN
+    indices.
+
+    Args:
+        df: Permit-level DataFrame with a 'deso' column (plain or categorical)
+        indices_df: DataFrame with one row per DeSO and its diversity indices
+
+    Returns:
+        DataFrame: Permits with diversity index columns appended
+    """
+    import pandas as pd
+    import numpy as np
+    keys = df['deso']
+    if isinstance(keys.dtype, pd.CategoricalDtype):
+        codes, areas = keys.cat.codes.to_numpy(), keys.cat.categories
+    else:
+        codes, areas = pd.factorize(keys)
+
+    # Code -1 (missing DeSO) selects the trailing all-NaN row
+    per_deso = indices_df.set_index('deso').reindex(areas)
+    values = np.vstack([per_deso.to_numpy(dtype=float),
+                        np.full((1, per_deso.shape[1]), np.nan)])
+    lookup = pd.DataFrame(values[codes], index=df.index, columns=per_deso.columns)
+    return pd.concat([df, lookup], axis=1)
+
+def lowercase_columns(df):
+    """
+    Map each column name to its lowercase form for keyword matching.
+
+    Args:
+        df: Any DataFrame
+
+    Returns:
+        dict: {column: lowercase column name}
+    """
+    return {col: col.lower() for col in df.columns}
@@ -1,20 +1,40 @@
 """
 Quick count of ALL permits in Sweden
+
+Sweden is queried as a grid of tiles rather than one bounding box: a single
+country-wide request returns clustered markers, so tiling gives a much
+closer count. Tiles go through the scraper's rate limiting one at a time.
 """
 
 from bygglov_scraper import BygglovScraper
 
+# Sweden bounding box, split into GRID_N x GRID_N tiles
+LAT_MIN, LAT_MAX = 55.0, 69.0
+LON_MIN, LON_MAX = 10.5, 24.5
+GRID_N = 10
+
 scraper = BygglovScraper()
 
-print("Querying all of Sweden...")
-locations = scraper.get_locations(
-    lat_min=55.0,
-    lat_max=69.0,
-    lon_min=10.5,
-    lon_max=24.5,
-    window=30,
-    types=[0, 1, 2, 3]
-)
+lat_step = (LAT_MAX - LAT_MIN) / GRID_N
+lon_step = (LON_MAX - LON_MIN) / GRID_N
+
+print(f"Querying all of Sweden as {GRID_N}x{GRID_N} tiles...")
+markers = {}
+for i in range(GRID_N):
+    for j in range(GRID_N):
+        locations = scraper.get_locations(
+            lat_min=LAT_MIN + i * lat_step,
+            lat_max=LAT_MIN + (i + 1) * lat_step,
+            lon_min=LON_MIN + j * lon_step,
+            lon_max=LON_MIN + (j + 1) * lon_step,
+            window=30,
+            types=[0, 1, 2, 3]
+        )
+        # Tiles share edges, so deduplicate markers by permit ID and position
+        for location in locations:
+            key = (location.get('properties', {}).get('id'),
+                   tuple(location.get('geometry', {}).get('coordinates', ())))
+            markers[key] = location
 
-print(f"\nFound {len(locations)} location markers in Sweden")
-print("(Note: This is clustered - actual count is higher)")
+print(f"\nFound {len(markers)} location markers in Sweden")
+print("(Note: Tiles may still be clustered - actual count can be higher)")
@@ -2,12 +2,13 @@
 Check for multicollinearity between income and diversity
 VIF analysis and correlation matrix
 """
-import pandas as pd
 import numpy as np
 from numpy.linalg import inv
+from summary_cache import load_municipality_summary
 
 # Load data
-df = pd.read_csv('../analysis/municipality_summary.csv')
+df = load_municipality_summary(['simpson_index', 'foreign_born_pct',
+                                'mean_income_sek', 'owner_share'])
 
 print("CORRELATION ANALYSIS: Income vs Diversity")
 print("=" * 60)
@@ -26,10 +27,12 @@ corr_income_owner = df['mean_income_sek'].corr(df['owner_share'])
 print(f"\nSimpson Index vs Owner Share: {corr_simpson_owner:.3f}")
 print(f"Mean Income vs Owner Share: {corr_income_owner:.3f}")
 
-# VIF calculation
-X = df[['simpson_index', 'mean_income_sek', 'owner_share']].dropna()
-X_std = (X - X.mean()) / X.std()
-X_with_const = np.column_stack([np.ones(len(X_std)), X_std])
+# VIF calculation: VIF_j is the j-th diagonal element of the inverse
+# correlation matrix, so one p x p inverse replaces p auxiliary regressions
+vif_cols = ['simpson_index', 'mean_income_sek', 'owner_share']
+X = df[vif_cols].dropna()
+R = np.corrcoef(X.to_numpy(dtype=np.float64), rowvar=False)
+vifs = np.diag(inv(R))
 
 print("\n" + "=" * 60)
 print("VARIANCE INFLATION FACTORS (VIF)")
@@ -37,17 +40,6 @@ print("=" * 60)
 print("Rule of thumb: VIF > 10 indicates serious multicollinearity")
 print("               VIF > 5 indicates moderate multicollinearity\n")
 
-for i, col in enumerate(['simpson_index', 'mean_income_sek', 'owner_share']):
-    y = X_std.iloc[:, i].values
-    X_others = np.delete(X_with_const, i+1, axis=1)
-
-    beta = inv(X_others.T @ X_others) @ X_others.T @ y
-    y_pred = X_others @ beta
-
-    ss_res = np.sum((y - y_pred)**2)
-    ss_tot = np.sum((y - y.mean())**2)
-    r2 = 1 - (ss_res / ss_tot)
-
-    vif = 1 / (1 - r2)
+for col, vif in zip(vif_cols, vifs):
     status = "OK" if vif < 5 else ("MODERATE" if vif < 10 else "SEVERE")
     print(f"{col:20s}: VIF = {vif:6.2f}  [{status}]")
@@ -4,19 +4,30 @@ Compare level vs log dependent variable
 """
 import pandas as pd
 import numpy as np
+from summary_cache import load_municipality_summary
 
 # Load data
-df = pd.read_csv('../analysis/municipality_summary.csv')
+df = load_municipality_summary(['simpson_index', 'mean_income_sek', 'owner_share',
+                                'total_population', 'permits_per_1000_dwellings'])
 
 # Prepare variables
 df['log_pop'] = np.log(df['total_population'] + 1)
 df['income_100k'] = df['mean_income_sek'] / 100000
 
 # Level Y
-y_level = df['permits_per_1000_dwellings'].values
+y_level = df['permits_per_1000_dwellings'].to_numpy(dtype=np.float64)
 
 # Log Y (add small constant to avoid log(0))
-y_log = np.log(df['permits_per_1000_dwellings'] + 0.01).values
+y_log = np.log(y_level + 0.01)
+
+# Full model: Simpson + Log Pop + Income + Owner. Both specifications share
+# X, so the sample and the Cholesky factor of X'X are computed once.
+X = df[['simpson_index', 'log_pop', 'income_100k', 'owner_share']].to_numpy(dtype=np.float64)
+X = np.column_stack([X, np.ones(len(X))])
+valid = np.isfinite(X).all(axis=1) & np.isfinite(y_level) & np.isfinite(y_log)
+X_clean = X[valid]
+Xt = X_clean.T
+L = np.linalg.cholesky(Xt @ X_clean)
 
 print("=" * 70)
 print("ROBUSTNESS CHECK: LOG(Y) vs LEVEL Y")
@@ -29,17 +40,12 @@ for spec_name, y_var in [('Level Y', y_level), ('Log(Y)', y_log)]:
     print(f"\n{spec_name}")
     print("-" * 70)
 
-    # Full model: Simpson + Log Pop + Income + Owner
-    X = df[['simpson_index', 'log_pop', 'income_100k', 'owner_share']].copy()
-    X['intercept'] = 1
-    valid = ~X.isna().any(axis=1) & ~np.isnan(y_var)
-    X_clean = X[valid].values
     y_clean = y_var[valid]
 
-    # OLS
-    beta = np.linalg.lstsq(X_clean, y_clean, rcond=None)[0]
-    y_pred = X_clean @ beta
-    ss_res = np.sum((y_clean - y_pred)**2)
+    # OLS via the shared Cholesky factor; only X'y changes with the outcome
+    Xty = Xt @ y_clean
+    beta = np.linalg.solve(L.T, np.linalg.solve(L, Xty))
+    ss_res = y_clean @ y_clean - beta @ Xty
     ss_tot = np.sum((y_clean - y_clean.mean())**2)
     r2 = 1 - (ss_res / ss_tot)
 
@@ -0,0 +1,24 @@
+"""
+Cached loader for the municipality summary, shared by the scripts in this
+folder (run from questions_code/, so the path is relative to it).
+"""
+import sys
+from pathlib import Path
+
+# The Parquet-cache CSV loader is shared with the scripts/ pipeline
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+from csv_cache import read_csv_cached
+
+SUMMARY_CSV = '../analysis/municipality_summary.csv'
+
+def load_municipality_summary(columns):
+    """
+    Load columns of the municipality summary via its Parquet cache.
+
+    Args:
+        columns: Column names to load
+
+    Returns:
+        DataFrame: Requested columns of the municipality summary
+    """
+    return read_csv_cached(SUMMARY_CSV, columns=columns)
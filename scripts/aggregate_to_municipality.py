@@ -13,36 +13,20 @@ References:
 
 import pandas as pd
 import numpy as np
+import pyarrow.parquet as pq
 from pathlib import Path
+from csv_cache import load_permits_table
 
 # File paths
-DESO_FILE = "data/deso_demographics/deso_cleaned.csv"
+DESO_FILE = "data/deso_demographics/deso_cleaned.parquet"
 PERMITS_FILE = "bygglov_sweden_complete_20251201_194602.csv"
 OUTPUT_DIR = "analysis"
 OUTPUT_FILE = f"{OUTPUT_DIR}/permits_with_demographics_municipality.csv"
 
-def extract_municipality(region_name):
-    """
-    Extract municipality name from DeSO region string.
-
-    Format: "Municipality (DeSO Area Name)"
-    Example: "Upplands Väsby (Bollstanäs)" -> "Upplands Väsby"
-
-    Args:
-        region_name: Full DeSO region string
-
-    Returns:
-        str: Municipality name
-    """
-    if pd.isna(region_name):
-        return None
-
-    # Split on first parenthesis
-    parts = region_name.split(' (')
-    if len(parts) > 0:
-        return parts[0].strip()
-    else:
-        return region_name.strip()
+# DeSO columns used by the aggregation (tenure shares are optional)
+DESO_COLUMNS = ['region', 'total_population', 'inrikes_fodda', 'utrikes_fodda',
+                'total_dwellings', 'mean_income_sek', 'hyresrätt_share',
+                'bostadsrätt_share', 'äganderätt_share', 'rental_share', 'owner_share']
 
 def aggregate_deso_to_municipality(deso_df):
     """
@@ -64,53 +48,46 @@ def aggregate_deso_to_municipality(deso_df):
     print("Aggregating DeSO to Municipality Level")
     print("=" * 60)
 
-    # Extract municipality name
-    deso_df['municipality'] = deso_df['region'].apply(extract_municipality)
+    # Extract municipality name: "Municipality (DeSO Area Name)" -> "Municipality"
+    deso_df['municipality'] = deso_df['region'].str.split(' (', n=1, regex=False).str[0].str.strip()
 
     print(f"DeSO areas: {len(deso_df)}")
     print(f"Unique municipalities: {deso_df['municipality'].nunique()}")
 
-    # Aggregate by municipality
-    agg_dict = {
-        # Population (sum)
-        'total_population': 'sum',
-        'inrikes_fodda': 'sum',
-        'utrikes_fodda': 'sum',
-
-        # Dwellings (sum)
-        'total_dwellings': 'sum',
-
-        # For weighted means, we'll calculate manually below
-        'mean_income_sek': 'mean',  # Simple mean for now
-    }
-
-    muni_df = deso_df.groupby('municipality').agg(agg_dict).reset_index()
-
-    # Recalculate foreign-born percentage
-    muni_df['foreign_born_pct'] = muni_df['utrikes_fodda'] / muni_df['total_population']
-
-    # Calculate population-weighted mean income
-    # (More accurate than simple mean)
-    income_weighted = deso_df.groupby('municipality').apply(
-        lambda x: np.average(x['mean_income_sek'], weights=x['total_population'])
-    ).reset_index(name='mean_income_sek_weighted')
-
-    muni_df = muni_df.merge(income_weighted, on='municipality', how='left')
-    muni_df['mean_income_sek'] = muni_df['mean_income_sek_weighted']
-    muni_df = muni_df.drop(columns=['mean_income_sek_weighted'])
-
-    # Calculate tenure shares at municipality level
-    # Sum dwellings by tenure type, then calculate shares
-    tenure_cols = ['hyresrätt_share', 'bostadsrätt_share', 'äganderätt_share',
-                   'rental_share', 'owner_share']
-
+    # Weighted means as ratios of grouped sums: income is weighted by
+    # population, tenure shares by dwellings (share is 0 without dwellings)
+    tenure_cols = [col for col in ['hyresrätt_share', 'bostadsrätt_share', 'äganderätt_share',
+                                   'rental_share', 'owner_share'] if col in deso_df.columns]
+    products = {'_num_mean_income_sek': deso_df['mean_income_sek'] * deso_df['total_population']}
+    for col in tenure_cols:
+        products[f'_num_{col}'] = deso_df[col] * deso_df['total_dwellings']
+
+    count_cols = ['total_population', 'inrikes_fodda', 'utrikes_fodda', 'total_dwellings']
+    columns = {col: deso_df[col] for col in count_cols}
+    columns.update(products)
+
+    # One bincount pass per column over integer municipality codes; like
+    # groupby().sum() this skips missing municipalities and missing values
+    codes, names = pd.factorize(deso_df['municipality'], sort=False)
+    keep = codes >= 0
+    codes = codes[keep]
+    sums = {}
+    for col, values in columns.items():
+        v = values.to_numpy(dtype=np.float64)[keep]
+        total = np.bincount(codes, weights=np.where(np.isnan(v), 0.0, v), minlength=len(names))
+        sums[col] = total.astype(values.dtype) if values.dtype.kind in 'iu' else total
+    sums = pd.DataFrame(sums, index=pd.Index(names, name='municipality'))
+
+    muni = {col: sums[col] for col in count_cols}
+    muni['mean_income_sek'] = sums['_num_mean_income_sek'] / sums['total_population']
+    muni['foreign_born_pct'] = sums['utrikes_fodda'] / sums['total_population']
+
+    dwellings = sums['total_dwellings']
+    has_dwellings = dwellings > 0
     for col in tenure_cols:
-        if col in deso_df.columns:
-            # Dwelling-weighted mean
-            weighted = deso_df.groupby('municipality').apply(
-                lambda x: np.average(x[col], weights=x['total_dwellings']) if x['total_dwellings'].sum() > 0 else 0
-            ).reset_index(name=col)
-            muni_df = muni_df.merge(weighted, on='municipality', how='left')
+        muni[col] = (sums[f'_num_{col}'] / dwellings.where(has_dwellings)).where(has_dwellings, 0.0)
+
+    muni_df = pd.DataFrame(muni).reset_index()
 
     print(f"\nMunicipality-level data: {len(muni_df)} municipalities")
     print(f"Mean foreign-born %: {muni_df['foreign_born_pct'].mean():.1%}")
@@ -137,8 +114,14 @@ def match_permits_to_municipalities(permits_df, muni_df):
     print(f"Municipalities in demographic data: {len(muni_df)}")
 
     # Clean municipality names in permits
-    permits_df['municipality_clean'] = permits_df['municipality'].str.strip()
-    muni_df['municipality_clean'] = muni_df['municipality'].str.strip()
+    permits_clean = permits_df['municipality'].str.strip()
+    muni_clean = muni_df['municipality'].str.strip()
+
+    # Share one categorical dtype across both sides so the join runs on
+    # integer codes; unmatched permit names stay as their own categories
+    cats = pd.CategoricalDtype(pd.unique(pd.concat([muni_clean, permits_clean], ignore_index=True).dropna()))
+    permits_df['municipality_clean'] = permits_clean.astype(cats)
+    muni_df['municipality_clean'] = muni_clean.astype(cats)
 
     # Merge
     merged = permits_df.merge(muni_df, left_on='municipality_clean',
@@ -153,7 +136,8 @@ def match_permits_to_municipalities(permits_df, muni_df):
 
     if match_rate < 90:
         print("\nWARNING: Low match rate. Checking unmatched municipalities...")
-        unmatched = merged[merged['foreign_born_pct'].isna()]['municipality_clean'].value_counts().head(10)
+        unmatched = (merged.loc[merged['foreign_born_pct'].isna(), 'municipality_clean']
+                     .cat.remove_unused_categories().value_counts().head(10))
         print("\nTop unmatched municipalities:")
         print(unmatched)
 
@@ -169,7 +153,8 @@ def main():
 
     # Load DeSO data
     print(f"\nLoading DeSO data from {DESO_FILE}...")
-    deso_df = pd.read_csv(DESO_FILE)
+    header = pq.read_schema(DESO_FILE).names
+    deso_df = pd.read_parquet(DESO_FILE, columns=[col for col in DESO_COLUMNS if col in header])
     print(f"Loaded {len(deso_df)} DeSO areas")
 
     # Aggregate to municipality
@@ -177,7 +162,7 @@ def main():
 
     # Load permits
     print(f"\nLoading permits from {PERMITS_FILE}...")
-    permits_df = pd.read_csv(PERMITS_FILE)
+    permits_df = load_permits_table(PERMITS_FILE)
     print(f"Loaded {len(permits_df)} permits")
 
     # Match permits to municipalities
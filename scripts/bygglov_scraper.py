@@ -9,14 +9,31 @@ IMPORTANT: This script includes rate limiting (1 request/second) to avoid overlo
 For research purposes only - not for commercial use.
 """
 
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
+import sqlite3
 import time
+import threading
 import csv
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple, Union
 import logging
 
+try:
+    import requests_cache
+except ImportError:  # requests-cache is optional; without it every request hits the network
+    requests_cache = None
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib decoder gives the same data
+    orjson = None
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -33,6 +50,32 @@ PERMIT_TYPES = {
     3: "Förhandsbesked"
 }
 
+# Columns written by save_to_csv and streamed scrapes (keys of extract_permit_data)
+FIELDS = [
+    'permit_id', 'property_name', 'municipal_case_id', 'publication_date',
+    'municipality', 'permit_type_num', 'permit_type', 'longitude', 'latitude'
+]
+
+# Rows between flushes when streaming permits to CSV
+FLUSH_EVERY = 100
+
+# Disk cache lifetimes: permit details rarely change, location searches do.
+# Details live in the permit-ID store; requests-cache holds location searches
+DETAILS_CACHE_SECONDS = 30 * 86400
+LOCATIONS_CACHE_SECONDS = 86400
+
+# Directory (relative to the working directory) for the on-disk caches;
+# ignored by git
+CACHE_DIR = '.bygglov_cache'
+
+# Sweden bounding box (approximate)
+SWEDEN_BBOX = {
+    'lat_min': 55.0,
+    'lat_max': 69.0,
+    'lon_min': 10.5,
+    'lon_max': 24.5
+}
+
 
 class BygglovScraper:
     """
@@ -45,28 +88,143 @@ class BygglovScraper:
 
     BASE_URL = "https://geoplan.se"
 
-    def __init__(self, rate_limit_seconds: float = 1.0):
+    def __init__(self,
+                 rate_limit_seconds: float = 1.0,
+                 max_in_flight: int = 4,
+                 cache_file: Optional[str] = os.path.join(CACHE_DIR, 'locations.sqlite'),
+                 details_file: Optional[str] = os.path.join(CACHE_DIR, 'permit_details.sqlite')):
         """
         Initialize scraper with rate limiting.
 
+        Call close() when done (or use the scraper as a context manager) to
+        release the permit-detail store and the HTTP session.
+
         Args:
             rate_limit_seconds: Seconds to wait between requests (default: 1 second)
+            max_in_flight: Maximum concurrent detail requests. Request starts are
+                still spaced by rate_limit_seconds; this only lets a slow response
+                overlap the wait before the next request.
+            cache_file: SQLite file for caching location searches on disk
+                (needs requests-cache; None disables caching). Cache hits skip
+                the rate limit.
+            details_file: SQLite store of permit detail JSON keyed by permit ID
+                (stdlib only; None disables it). Stored permits are never
+                refetched until DETAILS_CACHE_SECONDS have passed.
         """
         self.rate_limit = rate_limit_seconds
-        self.session = requests.Session()
+        self.max_in_flight = max_in_flight
+        self.cached = requests_cache is not None and cache_file is not None
+        if self.cached:
+            os.makedirs(os.path.dirname(cache_file) or '.', exist_ok=True)
+            self.session = requests_cache.CachedSession(
+                cache_file,
+                backend='sqlite',
+                allowable_methods=('GET',),
+                expire_after=LOCATIONS_CACHE_SECONDS,
+                urls_expire_after={'*/get_details/*': requests_cache.DO_NOT_CACHE}
+            )
+        else:
+            self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Academic Research Scraper (Housing Study)',
             'Accept': 'application/json'
         })
-        self.last_request_time = 0
+        # Back off exponentially on throttling and transient server errors
+        retry = Retry(
+            total=3,
+            backoff_factor=1.0,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=('GET',),
+            respect_retry_after_header=True
+        )
+        adapter = HTTPAdapter(max_retries=retry, pool_maxsize=max_in_flight)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.next_request_time = 0.0
+        self._rate_lock = threading.Lock()
+        # Integer permit IDs already written by the current streamed scrape
+        self._seen_ids = set()
+        # (lat_min, lat_max, lon_min, lon_max) of location searches that failed
+        # after retries; callers report them so gaps are not mistaken for empty areas
+        self.failed_cells = []
+
+        # Detail fetches run on worker threads, so one connection is shared
+        # behind a lock; WAL keeps writes cheap
+        self._details_db = None
+        self._db_lock = threading.Lock()
+        if details_file:
+            os.makedirs(os.path.dirname(details_file) or '.', exist_ok=True)
+            self._details_db = sqlite3.connect(details_file, isolation_level=None,
+                                               check_same_thread=False)
+            self._details_db.execute('PRAGMA journal_mode=WAL')
+            self._details_db.execute('PRAGMA synchronous=NORMAL')
+            self._details_db.execute(
+                'CREATE TABLE IF NOT EXISTS details (id INTEGER PRIMARY KEY, fetched REAL, body BLOB)')
+
+    def close(self):
+        """Close the permit-detail store and the HTTP session."""
+        if self._details_db is not None:
+            with self._db_lock:
+                self._details_db.close()
+            self._details_db = None
+        self.session.close()
+
+    def __enter__(self):
+        """Use the scraper in a with block; close() runs on exit."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Close the scraper when leaving a with block."""
+        self.close()
 
     def _rate_limit_wait(self):
-        """Enforce rate limiting between requests."""
-        elapsed = time.time() - self.last_request_time
-        if elapsed < self.rate_limit:
-            wait_time = self.rate_limit - elapsed
-            time.sleep(wait_time)
-        self.last_request_time = time.time()
+        """Enforce rate limiting between requests (thread-safe, burst of one)."""
+        # Each caller reserves the next free start slot, so starts stay
+        # rate_limit seconds apart however many threads are waiting
+        with self._rate_lock:
+            now = time.monotonic()
+            slot = max(now, self.next_request_time)
+            self.next_request_time = slot + self.rate_limit
+        if slot > now:
+            time.sleep(slot - now)
+
+    def _get(self, url: str, **kwargs) -> requests.Response:
+        """GET a URL, waiting for the rate limit only when the cache cannot answer."""
+        if self.cached:
+            response = self.session.get(url, only_if_cached=True, **kwargs)
+            if getattr(response, 'from_cache', False):
+                return response
+        self._rate_limit_wait()
+        return self.session.get(url, **kwargs)
+
+    @staticmethod
+    def _decode_json(response: requests.Response):
+        """Decode a JSON response body, with orjson when it is installed."""
+        # orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers'
+        # error handling is the same for both decoders
+        if orjson is not None:
+            return orjson.loads(response.content)
+        return response.json()
+
+    def _load_details(self, permit_id: int) -> Optional[Dict]:
+        """Return stored, unexpired detail JSON for a permit, or None."""
+        if self._details_db is None:
+            return None
+        with self._db_lock:
+            row = self._details_db.execute(
+                'SELECT body FROM details WHERE id = ? AND fetched > ?',
+                (permit_id, time.time() - DETAILS_CACHE_SECONDS)).fetchone()
+        if row is None:
+            return None
+        return orjson.loads(row[0]) if orjson is not None else json.loads(row[0])
+
+    def _store_details(self, permit_id: int, body: bytes):
+        """Save a permit's raw detail JSON in the permit-ID store."""
+        if self._details_db is None:
+            return
+        with self._db_lock:
+            self._details_db.execute('INSERT OR REPLACE INTO details VALUES (?, ?, ?)',
+                                     (permit_id, time.time(), body))
 
     def get_locations(self,
                      lat_min: float,
@@ -89,8 +247,25 @@ class BygglovScraper:
         Returns:
             List of location features with permit IDs
         """
-        self._rate_limit_wait()
+        result = self._query_locations(lat_min, lat_max, lon_min, lon_max, window, types)
+        return result[1] if result is not None else []
+
+    def _query_locations(self,
+                         lat_min: float,
+                         lat_max: float,
+                         lon_min: float,
+                         lon_max: float,
+                         window: int,
+                         types: List[int]) -> Optional[Tuple[int, List[Dict]]]:
+        """
+        Run one get_locations request.
 
+        A failed request is recorded in failed_cells.
+
+        Returns:
+            Tuple of (permit count reported by the API, location features),
+            or None if the request failed
+        """
         params = {
             'lat_min': lat_min,
             'lat_max': lat_max,
@@ -104,22 +279,22 @@ class BygglovScraper:
             url = f"{self.BASE_URL}/get_locations"
             logger.info(f"Fetching locations for bbox: ({lon_min:.3f}, {lat_min:.3f}) to ({lon_max:.3f}, {lat_max:.3f})")
 
-            response = self.session.get(url, params=params, timeout=30)
+            response = self._get(url, params=params, timeout=30)
             response.raise_for_status()
 
-            data = response.json()
+            data = self._decode_json(response)
             count = data.get('count', 0)
             features = data.get('data', {}).get('features', [])
 
             logger.info(f"Found {count} permits, retrieved {len(features)} location markers")
-            return features
+            return count, features
 
         except requests.exceptions.RequestException as e:
             logger.error(f"Request failed: {e}")
-            return []
         except json.JSONDecodeError as e:
             logger.error(f"JSON decode error: {e}")
-            return []
+        self.failed_cells.append((lat_min, lat_max, lon_min, lon_max))
+        return None
 
     def get_permit_details(self, permit_id: int) -> Dict:
         """
@@ -131,14 +306,19 @@ class BygglovScraper:
         Returns:
             Permit detail dictionary (GeoJSON Feature)
         """
-        self._rate_limit_wait()
+        details = self._load_details(permit_id)
+        if details is not None:
+            return details
 
         try:
             url = f"{self.BASE_URL}/get_details/{permit_id}"
-            response = self.session.get(url, timeout=30)
+            response = self._get(url, timeout=30)
             response.raise_for_status()
 
-            return response.json()
+            details = self._decode_json(response)
+            if details:
+                self._store_details(permit_id, response.content)
+            return details
 
         except requests.exceptions.RequestException as e:
             logger.error(f"Failed to fetch details for permit {permit_id}: {e}")
@@ -181,20 +361,37 @@ class BygglovScraper:
             return locations
 
         # Step 2: Fetch details for each permit
-        logger.info(f"Fetching details for {len(locations)} permits...")
-        detailed_permits = []
+        permit_ids = [pid for pid in (location.get('properties', {}).get('id')
+                                      for location in locations) if pid]
+        return self._fetch_details(permit_ids)
 
-        for i, location in enumerate(locations, 1):
-            permit_id = location.get('properties', {}).get('id')
-            if not permit_id:
-                continue
+    def _fetch_details(self, permit_ids: List[int]) -> List[Dict]:
+        """
+        Fetch details for a list of permit IDs.
 
-            if i % 100 == 0:
-                logger.info(f"Progress: {i}/{len(locations)} permits fetched")
+        Requests are pipelined across a few threads so network latency overlaps
+        the rate-limit wait; the shared rate limiter still spaces request starts.
 
-            details = self.get_permit_details(permit_id)
-            if details:
-                detailed_permits.append(details)
+        Args:
+            permit_ids: Permit IDs to fetch
+
+        Returns:
+            List of permit detail dictionaries (failed fetches are skipped)
+        """
+        # Permits already written by a streamed (or resumed) scrape need no refetch
+        if self._seen_ids:
+            permit_ids = [pid for pid in permit_ids if self._permit_key(pid) not in self._seen_ids]
+
+        logger.info(f"Fetching details for {len(permit_ids)} permits...")
+        detailed_permits = []
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            for i, details in enumerate(executor.map(self.get_permit_details, permit_ids), 1):
+                if i % 100 == 0:
+                    logger.info(f"Progress: {i}/{len(permit_ids)} permits fetched")
+
+                if details:
+                    detailed_permits.append(details)
 
         logger.info(f"Successfully fetched details for {len(detailed_permits)} permits")
         return detailed_permits
@@ -203,7 +400,8 @@ class BygglovScraper:
                      window: int = 30,
                      types: List[int] = [0, 1, 2, 3],
                      grid_size: float = 2.0,
-                     fetch_details: bool = True) -> List[Dict]:
+                     fetch_details: bool = True,
+                     output_file: Optional[str] = None) -> Union[List[Dict], int]:
         """
         Scrape all of Sweden by dividing it into a grid.
 
@@ -212,21 +410,21 @@ class BygglovScraper:
             types: Permit types to include
             grid_size: Size of each grid cell in degrees (smaller = more requests but less data per request)
             fetch_details: Whether to fetch full details (recommended)
+            output_file: If given, write cleaned permits to this CSV as each grid
+                cell finishes instead of keeping them in memory. An existing file
+                is resumed: its permits are kept and not fetched again.
 
         Returns:
-            List of all permits across Sweden
+            List of all permits across Sweden, or, when streaming to output_file,
+            the number of permits written by this run (resumed rows not included)
         """
-        # Sweden bounding box (approximate)
-        sweden_bbox = {
-            'lat_min': 55.0,
-            'lat_max': 69.0,
-            'lon_min': 10.5,
-            'lon_max': 24.5
-        }
+        sweden_bbox = SWEDEN_BBOX
 
         logger.info(f"Scraping all of Sweden with grid size {grid_size}°")
 
         all_permits = []
+        stream, writer = self.open_stream(output_file) if output_file else (None, None)
+        written = 0
 
         # Create grid
         lat = sweden_bbox['lat_min']
@@ -249,16 +447,200 @@ class BygglovScraper:
                     fetch_details=fetch_details
                 )
 
-                all_permits.extend(permits)
-                logger.info(f"Total permits collected so far: {len(all_permits)}")
+                if writer:
+                    written += self.write_rows(stream, writer, permits)
+                    logger.info(f"Total permits written so far: {written}")
+                else:
+                    all_permits.extend(permits)
+                    logger.info(f"Total permits collected so far: {len(all_permits)}")
 
                 lon += grid_size
 
             lat += grid_size
 
+        if stream:
+            self.close_stream(stream)
+            logger.info(f"Completed scraping Sweden: {written} new permits written to {output_file}")
+            return written
+
         logger.info(f"Completed scraping Sweden: {len(all_permits)} total permits")
         return all_permits
 
+    def open_stream(self, output_file: str):
+        """
+        Open a CSV for streamed output, resuming from it if it already exists.
+
+        Write permits with write_rows and finish with close_stream.
+
+        Args:
+            output_file: Path to the CSV file
+
+        Returns:
+            Tuple of (open file handle, csv.DictWriter)
+        """
+        self._seen_ids = set()
+        resume = os.path.exists(output_file) and os.path.getsize(output_file) > 0
+        if resume:
+            with open(output_file, newline='', encoding='utf-8') as f:
+                self._seen_ids.update(self._permit_key(row['permit_id']) for row in csv.DictReader(f))
+            logger.info(f"Resuming {output_file}: {len(self._seen_ids)} permits already saved")
+
+        stream = open(output_file, 'a' if resume else 'w', newline='', encoding='utf-8')
+        writer = csv.DictWriter(stream, fieldnames=FIELDS)
+        if not resume:
+            writer.writeheader()
+        return stream, writer
+
+    def close_stream(self, stream):
+        """Close a CSV opened with open_stream and forget its permit IDs."""
+        stream.close()
+        self._seen_ids = set()
+
+    @staticmethod
+    def _permit_key(permit_id):
+        """Dedup key for a permit ID: an int, so API ints and CSV strings compare equal."""
+        try:
+            return int(permit_id)
+        except (TypeError, ValueError):
+            return permit_id
+
+    def write_rows(self, stream, writer: csv.DictWriter, permits: List[Dict]) -> int:
+        """
+        Clean, deduplicate and write permits to a streamed CSV.
+
+        Args:
+            stream: File handle the writer writes to
+            writer: DictWriter with FIELDS as columns
+            permits: Raw permit objects
+
+        Returns:
+            Number of rows written
+        """
+        written = 0
+        for permit in permits:
+            row = self.extract_permit_data(permit)
+            key = self._permit_key(row['permit_id'])
+            if key in self._seen_ids:
+                continue
+            self._seen_ids.add(key)
+            writer.writerow(row)
+            written += 1
+            if written % FLUSH_EVERY == 0:
+                stream.flush()
+        stream.flush()
+        return written
+
+    def scrape_sweden_adaptive(self,
+                               window: int = 30,
+                               types: List[int] = [0, 1, 2, 3],
+                               max_per_cell: int = 500,
+                               min_cell_deg: float = 0.25,
+                               fetch_details: bool = True) -> List[Dict]:
+        """
+        Scrape all of Sweden with an adaptive quadtree instead of a fixed grid.
+
+        Args:
+            window: Time window in months
+            types: Permit types to include
+            max_per_cell: Split cells reporting more permits than this
+            min_cell_deg: Never split cells smaller than this (degrees latitude)
+            fetch_details: Whether to fetch full details (recommended)
+
+        Returns:
+            List of all permits across Sweden
+        """
+        logger.info(f"Scraping all of Sweden adaptively (max {max_per_cell} permits per cell)")
+
+        return self.scrape_bounding_box_adaptive(
+            SWEDEN_BBOX['lat_min'], SWEDEN_BBOX['lat_max'],
+            SWEDEN_BBOX['lon_min'], SWEDEN_BBOX['lon_max'],
+            window=window, types=types, max_per_cell=max_per_cell,
+            min_cell_deg=min_cell_deg, fetch_details=fetch_details)
+
+    def scrape_bounding_box_adaptive(self,
+                                     lat_min: float,
+                                     lat_max: float,
+                                     lon_min: float,
+                                     lon_max: float,
+                                     window: int = 30,
+                                     types: List[int] = [0, 1, 2, 3],
+                                     max_per_cell: int = 500,
+                                     min_cell_deg: float = 0.25,
+                                     fetch_details: bool = True) -> List[Dict]:
+        """
+        Scrape a bounding box with an adaptive quadtree instead of a single query.
+
+        Each visited cell costs one get_locations request. Empty cells (sea,
+        uninhabited land) are dropped with their whole subtree, and only cells
+        holding more than max_per_cell permits are split into four, so dense
+        areas are not cut off by the API's marker limit. Cells whose request
+        fails are skipped and recorded in failed_cells.
+
+        Args:
+            lat_min: Minimum latitude
+            lat_max: Maximum latitude
+            lon_min: Minimum longitude
+            lon_max: Maximum longitude
+            window: Time window in months
+            types: Permit types to include
+            max_per_cell: Split cells reporting more permits than this
+            min_cell_deg: Never split cells smaller than this (degrees latitude)
+            fetch_details: Whether to fetch full details (recommended)
+
+        Returns:
+            List of permits in the bounding box
+        """
+        all_permits = []
+        seen_ids = set()
+        stack = [(lat_min, lat_max, lon_min, lon_max)]
+        cell_count = 0
+        failed_count = 0
+
+        while stack:
+            lat0, lat1, lon0, lon1 = stack.pop()
+            cell_count += 1
+            result = self._query_locations(lat0, lat1, lon0, lon1, window, types)
+
+            if result is None:
+                failed_count += 1
+                continue
+
+            count, locations = result
+            if count == 0:
+                continue
+
+            if count > max_per_cell:
+                if (lat1 - lat0) > min_cell_deg:
+                    lat_mid = (lat0 + lat1) / 2
+                    lon_mid = (lon0 + lon1) / 2
+                    stack.extend([(lat0, lat_mid, lon0, lon_mid), (lat0, lat_mid, lon_mid, lon1),
+                                  (lat_mid, lat1, lon0, lon_mid), (lat_mid, lat1, lon_mid, lon1)])
+                    continue
+                logger.warning(f"Cell lat {lat0:.4f}-{lat1:.4f}, lon {lon0:.4f}-{lon1:.4f} still reports "
+                               f"{count} permits at the minimum cell size; only {len(locations)} "
+                               f"markers were returned")
+
+            # Cells share edges, so skip permits already collected from a neighbour
+            new_locations = []
+            for location in locations:
+                permit_id = location.get('properties', {}).get('id')
+                if permit_id and permit_id not in seen_ids:
+                    seen_ids.add(permit_id)
+                    new_locations.append(location)
+
+            if fetch_details:
+                all_permits.extend(self._fetch_details(
+                    [location['properties']['id'] for location in new_locations]))
+            else:
+                all_permits.extend(new_locations)
+            logger.info(f"Total permits collected so far: {len(all_permits)}")
+
+        logger.info(f"Completed bounding box: {len(all_permits)} total permits "
+                    f"from {cell_count} cells")
+        if failed_count:
+            logger.warning(f"{failed_count} cells failed and were skipped (see failed_cells)")
+        return all_permits
+
     @staticmethod
     def extract_permit_data(permit: Dict) -> Dict:
         """
@@ -279,8 +661,7 @@ class BygglovScraper:
             # For polygon, get centroid (simple average of vertices)
             vertices = coords[0] if coords else []
             if vertices:
-                lon = sum(v[0] for v in vertices) / len(vertices)
-                lat = sum(v[1] for v in vertices) / len(vertices)
+                lon, lat = np.asarray(vertices, dtype=np.float64)[:, :2].mean(axis=0).tolist()
             else:
                 lon, lat = None, None
         elif geometry.get('type') == 'Point' and len(coords) >= 2:
@@ -308,24 +689,17 @@ class BygglovScraper:
             logger.warning("No permits to save")
             return
 
-        cleaned_permits = [self.extract_permit_data(p) for p in permits]
-
-        # Remove duplicates by permit_id
-        seen_ids = set()
-        unique_permits = []
-        for p in cleaned_permits:
-            if p['permit_id'] not in seen_ids:
-                seen_ids.add(p['permit_id'])
-                unique_permits.append(p)
-
-        logger.info(f"Removed {len(cleaned_permits) - len(unique_permits)} duplicate permits")
-
+        # Clean, deduplicate by permit_id and write one row at a time, so no
+        # second list of cleaned permits is built
+        self._seen_ids = set()
         with open(output_file, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=unique_permits[0].keys())
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
             writer.writeheader()
-            writer.writerows(unique_permits)
+            written = self.write_rows(f, writer, permits)
+        self._seen_ids = set()
 
-        logger.info(f"Saved {len(unique_permits)} permits to {output_file}")
+        logger.info(f"Removed {len(permits) - written} duplicate permits")
+        logger.info(f"Saved {written} permits to {output_file}")
 
 
 def main():
@@ -363,6 +737,8 @@ def main():
     #     fetch_details=True
     # )
 
+    scraper.close()
+
     # Save to CSV
     if permits:
         output_file = f"bygglov_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
@@ -0,0 +1,66 @@
+"""
+Parquet Caches for CSV Inputs
+=============================
+Shared loader for the pipeline scripts. Each CSV input is converted to a
+zstd Parquet copy on first use (and again whenever the CSV is newer), so
+later runs skip CSV parsing and read only the columns they need.
+
+Copies live in a .parquet_cache/ directory next to the CSV (ignored by git),
+one per set of read options, so callers parsing the same CSV differently
+never share a cache file.
+
+Scripts in this directory import it as a sibling module, like bygglov_scraper:
+    from csv_cache import load_permits_table, read_csv_cached
+Scripts elsewhere put this directory on sys.path first.
+"""
+
+import hashlib
+import pandas as pd
+from pathlib import Path
+
+# Cache directory created next to each cached CSV
+CACHE_DIR_NAME = '.parquet_cache'
+
+# Schema of the scraped permits CSV (dates stay strings, as in the CSV)
+PERMIT_DTYPES = {
+    'permit_id': 'int64', 'property_name': 'str', 'municipal_case_id': 'str',
+    'publication_date': 'str', 'municipality': 'str', 'permit_type_num': 'int64',
+    'permit_type': 'str', 'longitude': 'float64', 'latitude': 'float64'
+}
+
+def read_csv_cached(filepath, columns=None, filters=None, **read_csv_kwargs):
+    """
+    Load a CSV via a cached Parquet copy.
+
+    The CSV is converted to Parquet on first use (and again whenever the
+    CSV is newer); every later run reads only the requested columns, and
+    row filters are applied while reading.
+
+    Args:
+        filepath: Path to the CSV
+        columns: Column names to load (all when None)
+        filters: Optional row filters, e.g. [('kön', '==', 'totalt')]
+        **read_csv_kwargs: Extra pd.read_csv options; part of the cache key
+
+    Returns:
+        DataFrame: Requested columns of the matching rows
+    """
+    csv_path = Path(filepath)
+    options_key = hashlib.sha1(repr(sorted(read_csv_kwargs.items())).encode()).hexdigest()[:8]
+    parquet_path = csv_path.parent / CACHE_DIR_NAME / f"{csv_path.stem}-{options_key}.parquet"
+    if not parquet_path.exists() or parquet_path.stat().st_mtime < csv_path.stat().st_mtime:
+        parquet_path.parent.mkdir(exist_ok=True)
+        pd.read_csv(csv_path, engine='pyarrow', **read_csv_kwargs).to_parquet(parquet_path, compression='zstd')
+    return pd.read_parquet(parquet_path, columns=columns, filters=filters)
+
+def load_permits_table(filepath):
+    """
+    Load the scraped permits CSV via its Parquet cache with a fixed schema.
+
+    Args:
+        filepath: Path to the permits CSV
+
+    Returns:
+        DataFrame: Permit records
+    """
+    return read_csv_cached(filepath, dtype=PERMIT_DTYPES)
@@ -12,8 +12,10 @@ This script:
 
 import pandas as pd
 import geopandas as gpd
+import shapely
 from pathlib import Path
 import numpy as np
+from csv_cache import load_permits_table
 
 # Configuration
 DATA_DIR = Path("data")
@@ -25,15 +27,17 @@ OUTPUT_FILE = "permits_with_demographics.csv"
 def load_permits(filepath):
     """Load building permit data and convert to GeoDataFrame."""
     print(f"Loading permits from {filepath}...")
-    df = pd.read_csv(filepath)
+    df = load_permits_table(filepath)
 
     # Remove rows with missing coordinates
-    df = df.dropna(subset=['longitude', 'latitude'])
+    x = df['longitude'].to_numpy(dtype=np.float64)
+    y = df['latitude'].to_numpy(dtype=np.float64)
+    has_coords = ~(np.isnan(x) | np.isnan(y))
 
-    # Convert to GeoDataFrame
+    # Convert to GeoDataFrame, building all points in one vectorized call
     gdf = gpd.GeoDataFrame(
-        df,
-        geometry=gpd.points_from_xy(df.longitude, df.latitude),
+        df[has_coords].reset_index(drop=True),
+        geometry=shapely.points(x[has_coords], y[has_coords]),
         crs="EPSG:4326"  # WGS84 (standard lat/lon)
     )
 
@@ -72,24 +76,26 @@ def spatial_join_permits_to_deso(permits_gdf, deso_gdf, deso_code_col='deso'):
     """Spatially join permits to DeSO areas."""
     print("Performing spatial join (this may take a minute)...")
 
-    # Spatial join: find which DeSO polygon each permit falls into
-    joined = gpd.sjoin(
-        permits_gdf,
-        deso_gdf[[deso_code_col, 'geometry']],
-        how='left',
-        predicate='within'
-    )
+    # Find which DeSO polygon each permit falls into. Querying an STRtree
+    # directly returns (permit, polygon) index pairs without materialising
+    # a joined geometry frame
+    tree = shapely.STRtree(np.asarray(deso_gdf.geometry.values))
+    permit_idx, deso_idx = tree.query(np.asarray(permits_gdf.geometry.values), predicate='within')
+
+    deso_codes = np.full(len(permits_gdf), None, dtype=object)
+    deso_codes[permit_idx] = deso_gdf[deso_code_col].to_numpy()[deso_idx]
+
+    # Drop the geometry column for easier manipulation
+    result = pd.DataFrame(permits_gdf.drop(columns='geometry'))
+    result[deso_code_col] = deso_codes
 
     # Count how many permits didn't match a DeSO area
-    unmatched = joined[deso_code_col].isna().sum()
+    unmatched = result[deso_code_col].isna().sum()
     if unmatched > 0:
         print(f"WARNING: {unmatched} permits could not be matched to a DeSO area")
         print("(They might be outside DeSO boundaries or have coordinate errors)")
 
-    print(f"Successfully matched {len(joined) - unmatched} permits to DeSO areas")
-
-    # Drop the geometry column for easier manipulation
-    result = pd.DataFrame(joined.drop(columns='geometry'))
+    print(f"Successfully matched {len(result) - unmatched} permits to DeSO areas")
 
     return result
 
@@ -97,7 +103,9 @@ def load_demographics(filepath):
     """Load DeSO demographic statistics."""
     print(f"Loading demographics from {filepath}...")
 
-    df = pd.read_csv(filepath)
+    # Arrow's multithreaded reader; the DeSO code is alphanumeric, so it
+    # is read as a string either way
+    df = pd.read_csv(filepath, engine='pyarrow')
 
     print(f"Loaded demographics for {len(df)} DeSO areas")
     print(f"Demographic columns: {list(df.columns)}")
@@ -109,29 +117,28 @@ def calculate_diversity_index(df, swedish_col, foreign_col):
     Calculate Simpson diversity index.
 
     Higher values = more diverse
-    Formula: 1 - sum(p_i^2) where p_i is proportion of group i
+    Formula: 1 - sum(p_i^2) where p_i is proportion of group i.
+    With two groups s and f this is 2*s*f / (s + f)^2, computed in one pass.
     """
-    total = df[swedish_col] + df[foreign_col]
-
-    # Avoid division by zero
-    total = total.replace(0, np.nan)
-
-    p_swedish = df[swedish_col] / total
-    p_foreign = df[foreign_col] / total
+    s = df[swedish_col].to_numpy(dtype=np.float64)
+    f = df[foreign_col].to_numpy(dtype=np.float64)
+    total = s + f
 
-    simpson = 1 - (p_swedish**2 + p_foreign**2)
+    # Avoid division by zero: empty areas get NaN
+    with np.errstate(divide='ignore', invalid='ignore'):
+        simpson = np.where(total > 0, 2.0 * s * f / (total * total), np.nan)
 
-    return simpson
+    return pd.Series(simpson, index=df.index)
 
 def merge_and_analyze(permits_df, demographics_df, deso_code_col='deso'):
     """Merge permits with demographics and calculate diversity measures."""
     print("Merging permits with demographics...")
 
-    # Merge on DeSO code
-    merged = permits_df.merge(
-        demographics_df,
-        left_on=deso_code_col,
-        right_on=deso_code_col,  # Adjust if demographics has different column name
+    # Merge on DeSO code via the demographics index (adjust if demographics
+    # has a different column name); same rows and columns as a left merge
+    merged = permits_df.join(
+        demographics_df.set_index(deso_code_col),
+        on=deso_code_col,
         how='left'
     )
 
@@ -10,16 +10,35 @@ Input files (from C:/Users/Hampu/housing_study/):
 - deso_housing_tenure.csv: Housing tenure distribution
 
 Output:
-- data/deso_demographics/deso_cleaned.csv: Ready for merging with permits
+- data/deso_demographics/deso_cleaned.parquet: Ready for merging with permits
 """
 
-import pandas as pd
 import numpy as np
 from pathlib import Path
+from csv_cache import read_csv_cached
 
 # File paths
 INPUT_DIR = "data/deso_demographics"
-OUTPUT_FILE = "data/deso_demographics/deso_cleaned.csv"
+OUTPUT_FILE = "data/deso_demographics/deso_cleaned.parquet"
+
+def load_scb_table(filename, columns, filters=None):
+    """
+    Load columns of an SCB table via a cached Parquet copy.
+
+    The CSV is converted to Parquet on first use (and again whenever the
+    CSV is newer); every later run reads only the requested columns, and
+    row filters are applied while reading.
+
+    Args:
+        filename: CSV file name in INPUT_DIR
+        columns: Column names to load
+        filters: Optional row filters, e.g. [('kön', '==', 'totalt')]
+
+    Returns:
+        DataFrame: Requested columns of the matching rows
+    """
+    return read_csv_cached(Path(INPUT_DIR) / filename, columns=columns, filters=filters,
+                           encoding='utf-8-sig')
 
 def process_foreign_born_data():
     """
@@ -38,16 +57,14 @@ def process_foreign_born_data():
     print("Processing Foreign-Born Data")
     print("=" * 60)
 
-    df = pd.read_csv(f"{INPUT_DIR}/deso_foreign_born.csv")
-    print(f"Loaded {len(df)} rows")
-
-    # Filter to "totalt" (all genders combined)
-    df = df[df['kön'] == 'totalt'].copy()
-    print(f"After filtering to totalt gender: {len(df)} rows")
+    # Only "totalt" (all genders combined) rows are read
+    df = load_scb_table("deso_foreign_born.csv", ['region', 'födelseregion', 'Antal 2023'],
+                        filters=[('kön', '==', 'totalt')])
+    print(f"Loaded {len(df)} rows for totalt gender")
 
     # Reshape: separate rows for Sverige vs totalt
-    sweden = df[df['födelseregion'] == 'Sverige'].copy()
-    total = df[df['födelseregion'] == 'totalt'].copy()
+    sweden = df[df['födelseregion'] == 'Sverige']
+    total = df[df['födelseregion'] == 'totalt']
 
     # Use most recent year (2023)
     sweden = sweden[['region', 'Antal 2023']].rename(columns={'Antal 2023': 'inrikes_fodda'})
@@ -63,6 +80,10 @@ def process_foreign_born_data():
     # Clean up
     result = result[result['total_population'] > 0]  # Remove empty areas
 
+    # Population counts fit in 32 bits (skipped if a missing Sverige row made a column float)
+    count_cols = ['total_population', 'inrikes_fodda', 'utrikes_fodda']
+    result = result.astype({col: np.int32 for col in count_cols if result[col].dtype.kind == 'i'})
+
     print(f"\nProcessed {len(result)} DeSO areas")
     print(f"Mean foreign-born %: {result['foreign_born_pct'].mean():.1%}")
     print(f"Range: {result['foreign_born_pct'].min():.1%} to {result['foreign_born_pct'].max():.1%}")
@@ -76,21 +97,19 @@ def process_income_data():
     Extract mean wage income (löneinkomst) for each DeSO area.
 
     Returns:
-        DataFrame with DeSO-level income
+        DataFrame with DeSO-level income, indexed by region
     """
     print("\n" + "=" * 60)
     print("Processing Income Data")
     print("=" * 60)
 
-    df = pd.read_csv(f"{INPUT_DIR}/deso_income.csv")
+    # Only wage income ("löneinkomst") rows for totalt gender are read
+    df = load_scb_table("deso_income.csv", ['region', 'Medelvärde för samtliga, tkr 2023'],
+                        filters=[('inkomstkomponent', '==', 'löneinkomst '), ('kön', '==', 'totalt')])
     print(f"Loaded {len(df)} rows")
 
-    # Filter to wage income ("löneinkomst") and totalt gender
-    df = df[(df['inkomstkomponent'] == 'löneinkomst ') & (df['kön'] == 'totalt')].copy()
-
     # Use most recent year (2023)
-    result = df[['region', 'Medelvärde för samtliga, tkr 2023']].copy()
-    result = result.rename(columns={'Medelvärde för samtliga, tkr 2023': 'mean_income_tkr'})
+    result = df.rename(columns={'Medelvärde för samtliga, tkr 2023': 'mean_income_tkr'})
 
     # Convert to SEK (from thousands)
     result['mean_income_sek'] = result['mean_income_tkr'] * 1000
@@ -98,7 +117,7 @@ def process_income_data():
     print(f"\nProcessed {len(result)} DeSO areas")
     print(f"Mean income: {result['mean_income_tkr'].mean():.1f} tkr ({result['mean_income_sek'].mean():.0f} SEK)")
 
-    return result
+    return result.set_index('region')
 
 def process_tenure_data():
     """
@@ -112,41 +131,38 @@ def process_tenure_data():
     - Owner-occupied share (bostadsrätt + äganderätt)
 
     Returns:
-        DataFrame with DeSO-level tenure composition
+        DataFrame with DeSO-level tenure composition, indexed by region
     """
     print("\n" + "=" * 60)
     print("Processing Tenure Data")
     print("=" * 60)
 
-    df = pd.read_csv(f"{INPUT_DIR}/deso_housing_tenure.csv", encoding='utf-8-sig')
-    print(f"Loaded {len(df)} rows")
-
     # Use most recent year (2023)
-    df = df[['region', 'upplåtelseform', 'Antal 2023']].copy()
+    df = load_scb_table("deso_housing_tenure.csv", ['region', 'upplåtelseform', 'Antal 2023'])
+    print(f"Loaded {len(df)} rows")
     df = df.rename(columns={'Antal 2023': 'dwellings'})
 
     # Pivot to wide format
-    pivot = df.pivot(index='region', columns='upplåtelseform', values='dwellings').reset_index()
-    pivot = pivot.fillna(0)
+    pivot = df.pivot(index='region', columns='upplåtelseform', values='dwellings').fillna(0)
 
-    # Calculate total dwellings
-    pivot['total_dwellings'] = pivot.iloc[:, 1:].sum(axis=1)
+    # Calculate total dwellings (every tenure form, including unknown)
+    total = pivot.to_numpy().sum(axis=1)
+    pivot['total_dwellings'] = total
 
-    # Calculate shares (handle division by zero)
-    for col in ['hyresrätt', 'bostadsrätt', 'äganderätt']:
-        if col in pivot.columns:
-            pivot[f'{col}_share'] = pivot[col] / pivot['total_dwellings']
-            pivot[f'{col}_share'] = pivot[f'{col}_share'].fillna(0)
-
-    # Calculate owner-occupied share (bostadsrätt + äganderätt)
+    # Shares of all dwellings, including owner-occupied (bostadsrätt +
+    # äganderätt) and rental, as one block division (0 without dwellings)
+    share_cols = [col for col in ['hyresrätt', 'bostadsrätt', 'äganderätt'] if col in pivot.columns]
+    numerators = {f'{col}_share': pivot[col].to_numpy(dtype=np.float64) for col in share_cols}
     if 'bostadsrätt' in pivot.columns and 'äganderätt' in pivot.columns:
-        pivot['owner_share'] = (pivot['bostadsrätt'] + pivot['äganderätt']) / pivot['total_dwellings']
-        pivot['owner_share'] = pivot['owner_share'].fillna(0)
-
-    # Rental share
+        numerators['owner_share'] = numerators['bostadsrätt_share'] + numerators['äganderätt_share']
     if 'hyresrätt' in pivot.columns:
-        pivot['rental_share'] = pivot['hyresrätt'] / pivot['total_dwellings']
-        pivot['rental_share'] = pivot['rental_share'].fillna(0)
+        numerators['rental_share'] = numerators['hyresrätt_share']
+
+    if numerators:
+        num = np.column_stack(list(numerators.values()))
+        has_dwellings = (total > 0)[:, None]
+        pivot[list(numerators)] = np.divide(num, total[:, None], out=np.zeros_like(num),
+                                            where=has_dwellings)
 
     print(f"\nProcessed {len(pivot)} DeSO areas")
     if 'rental_share' in pivot.columns:
@@ -155,13 +171,14 @@ def process_tenure_data():
         print(f"Mean owner share: {pivot['owner_share'].mean():.1%}")
 
     # Keep only necessary columns
-    keep_cols = ['region', 'total_dwellings']
+    keep_cols = ['total_dwellings']
     for col in ['hyresrätt_share', 'bostadsrätt_share', 'äganderätt_share',
                 'rental_share', 'owner_share']:
         if col in pivot.columns:
             keep_cols.append(col)
 
-    result = pivot[keep_cols].copy()
+    # Dwelling counts fit in 32 bits; region stays the (sorted) index
+    result = pivot[keep_cols].astype({'total_dwellings': np.int32})
 
     return result
 
@@ -171,8 +188,8 @@ def merge_all_data(population_df, income_df, tenure_df):
 
     Args:
         population_df: Population and diversity data
-        income_df: Income data
-        tenure_df: Tenure data
+        income_df: Income data, indexed by region
+        tenure_df: Tenure data, indexed by region
 
     Returns:
         DataFrame: Complete DeSO-level dataset
@@ -181,13 +198,13 @@ def merge_all_data(population_df, income_df, tenure_df):
     print("Merging All Data")
     print("=" * 60)
 
-    # Merge population + income
-    merged = population_df.merge(income_df, on='region', how='left')
-    print(f"After merging population + income: {len(merged)} DeSO areas")
-
-    # Merge + tenure
-    merged = merged.merge(tenure_df, on='region', how='left')
-    print(f"After merging + tenure: {len(merged)} DeSO areas")
+    # Align income and tenure to the population areas in one indexed join;
+    # population order is kept for the output
+    merged = population_df.set_index('region').join(
+        [income_df, tenure_df],
+        how='left'
+    ).reset_index()
+    print(f"After merging population + income + tenure: {len(merged)} DeSO areas")
 
     # Extract DeSO code from region name
     # Format: "Municipality (DeSO Name)" -> we want the municipality + name
@@ -217,9 +234,9 @@ def main():
     # Merge all
     final_df = merge_all_data(population_df, income_df, tenure_df)
 
-    # Save
+    # Save (Parquet keeps dtypes and dictionary-encodes the string columns)
     Path(OUTPUT_FILE).parent.mkdir(parents=True, exist_ok=True)
-    final_df.to_csv(OUTPUT_FILE, index=False)
+    final_df.to_parquet(OUTPUT_FILE, index=False, compression='zstd')
 
     print("\n" + "=" * 60)
     print("✓ COMPLETE")
@@ -8,11 +8,95 @@ effects persist after controlling for confounding variables.
 import pandas as pd
 import numpy as np
 from pathlib import Path
+from csv_cache import read_csv_cached
+
+try:
+    from numba import njit, prange
+except ImportError:  # Numba is optional; the NumPy path fits the same resamples
+    njit = None
 
 # File paths
 INPUT_FILE = "analysis/municipality_summary.csv"
 OUTPUT_DIR = "analysis/results"
 
+# Bootstrap resamples for the Model 3 confidence interval (fixed seed so
+# reruns print the same interval)
+BOOTSTRAP_RESAMPLES = 1000
+BOOTSTRAP_SEED = 0
+
+# Regressor columns, extracted from the summary as one float32 NumPy block
+# (every regressor sits in a range float32 holds to ~7 significant digits)
+REGRESSORS = ['simpson_index', 'shannon_index', 'foreign_born_pct', 'total_population',
+              'mean_income_sek', 'owner_share']
+
+def ols(X, y):
+    """
+    OLS via a Cholesky solve of the normal equations X'X beta = X'y.
+
+    The design matrix may be stored as float32; the normal equations are
+    formed and solved in float64, since squaring X loses precision.
+
+    Args:
+        X: Design matrix (n x p, including the intercept column)
+        y: Dependent variable (n,)
+
+    Returns:
+        beta: coefficients
+        ss_res: residual sum of squares
+    """
+    X = X.astype(np.float64, copy=False)
+    XtX = X.T @ X
+    Xty = X.T @ y
+    if not (np.isfinite(XtX).all() and np.isfinite(Xty).all()):
+        raise ValueError("OLS inputs must not contain infs or NaNs")
+    L = np.linalg.cholesky(XtX)
+    beta = np.linalg.solve(L.T, np.linalg.solve(L, Xty))
+    # At the solution, e'e = y'y - beta'X'y (no residual vector needed)
+    return beta, y @ y - beta @ Xty
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _bootstrap_kernel(X, y, idx, out):
+        """Normal-equation OLS for every resample (rows idx[b]), in parallel."""
+        n_boot, n = idx.shape
+        p = X.shape[1]
+        for b in prange(n_boot):
+            XtX = np.zeros((p, p))
+            Xty = np.zeros(p)
+            for i in range(n):
+                r = idx[b, i]
+                for j in range(p):
+                    Xty[j] += X[r, j] * y[r]
+                    for k in range(p):
+                        XtX[j, k] += X[r, j] * X[r, k]
+            out[b] = np.linalg.solve(XtX, Xty)
+
+def bootstrap_coefs(X, y, n_boot=BOOTSTRAP_RESAMPLES, seed=BOOTSTRAP_SEED):
+    """
+    OLS coefficients on bootstrap resamples of the rows of (X, y).
+
+    Resample indices are drawn up front with NumPy, so the Numba kernel and
+    the fallback loop fit exactly the same resamples.
+
+    Args:
+        X: Design matrix (n x p, including the intercept column)
+        y: Dependent variable (n,)
+        n_boot: Number of resamples
+        seed: Seed for the resample indices
+
+    Returns:
+        ndarray: Coefficients, shape (n_boot, p)
+    """
+    idx = np.random.default_rng(seed).integers(0, len(y), size=(n_boot, len(y)))
+    out = np.empty((n_boot, X.shape[1]))
+    if njit is not None:
+        _bootstrap_kernel(np.ascontiguousarray(X, dtype=np.float64),
+                          np.ascontiguousarray(y, dtype=np.float64), idx, out)
+    else:
+        for b in range(n_boot):
+            out[b] = ols(X[idx[b]], y[idx[b]])[0]
+    return out
+
 def run_regressions():
     """
     Run OLS regressions with progressive control addition.
@@ -25,11 +109,32 @@ def run_regressions():
     print("=" * 60)
 
     # Load data
-    df = pd.read_csv(INPUT_FILE)
+    df = read_csv_cached(INPUT_FILE, columns=['permits_per_1000_dwellings'] + REGRESSORS)
     print(f"\nLoaded {len(df)} municipalities")
 
     # Dependent variable: permits per 1000 dwellings
-    y = df['permits_per_1000_dwellings'].values
+    y = df['permits_per_1000_dwellings'].to_numpy(dtype=np.float64)
+
+    # All regressors pulled out of the frame in one block; models slice columns
+    data = df[REGRESSORS].to_numpy(dtype=np.float32)
+    col = {name: i for i, name in enumerate(REGRESSORS)}
+    simpson = data[:, col['simpson_index']]
+    shannon = data[:, col['shannon_index']]
+    foreign_born = data[:, col['foreign_born_pct']]
+    intercept = np.ones(len(df), dtype=np.float32)
+    y_mean = y.mean()
+
+    # Total sum of squares per estimation sample; models sharing a
+    # complete-case sample reuse it
+    ss_tot_cache = {}
+
+    def total_ss(mask):
+        """Total sum of squares of y over the rows selected by a boolean mask."""
+        key = np.packbits(mask).tobytes()
+        if key not in ss_tot_cache:
+            y_sample = y[mask]
+            ss_tot_cache[key] = np.sum((y_sample - y_sample.mean())**2)
+        return ss_tot_cache[key]
 
     # Create output directory
     Path(OUTPUT_DIR).mkdir(parents=True, exist_ok=True)
@@ -42,17 +147,13 @@ def run_regressions():
     print("Model 1: Bivariate (Simpson Index only)")
     print("=" * 60)
 
-    X1 = df[['simpson_index']].copy()
-    X1['intercept'] = 1
+    X1 = np.column_stack([simpson, intercept])
 
     # Manual OLS: beta = (X'X)^-1 X'y
-    beta1 = np.linalg.lstsq(X1.values, y, rcond=None)[0]
-    y_pred1 = X1.values @ beta1
-    residuals1 = y - y_pred1
+    beta1, ss_res1 = ols(X1, y)
 
     # R-squared
-    ss_res1 = np.sum(residuals1**2)
-    ss_tot1 = np.sum((y - np.mean(y))**2)
+    ss_tot1 = np.sum((y - y_mean)**2)
     r2_1 = 1 - (ss_res1 / ss_tot1)
 
     print(f"\nIntercept: {beta1[1]:.3f}")
@@ -74,15 +175,11 @@ def run_regressions():
     print("=" * 60)
 
     # Log population (add 1 to avoid log(0))
-    df['log_population'] = np.log(df['total_population'] + 1)
+    log_population = np.log(data[:, col['total_population']] + 1)
 
-    X2 = df[['simpson_index', 'log_population']].copy()
-    X2['intercept'] = 1
+    X2 = np.column_stack([simpson, log_population, intercept])
 
-    beta2 = np.linalg.lstsq(X2.values, y, rcond=None)[0]
-    y_pred2 = X2.values @ beta2
-    residuals2 = y - y_pred2
-    ss_res2 = np.sum(residuals2**2)
+    beta2, ss_res2 = ols(X2, y)
     r2_2 = 1 - (ss_res2 / ss_tot1)
 
     print(f"\nIntercept: {beta2[2]:.3f}")
@@ -103,21 +200,21 @@ def run_regressions():
     print("=" * 60)
 
     # Standardize income (in units of 100k SEK)
-    df['income_100k'] = df['mean_income_sek'] / 100000
+    income_100k = data[:, col['mean_income_sek']] / 100000
 
-    X3 = df[['simpson_index', 'log_population', 'income_100k', 'owner_share']].copy()
-    X3['intercept'] = 1
+    # Controls shared by Models 3-5 (plus intercept), built and NaN-checked once;
+    # each model stacks its own diversity measure in front
+    controls = np.column_stack([log_population, income_100k,
+                                data[:, col['owner_share']], intercept])
+    valid_controls = ~np.isnan(controls).any(axis=1) & ~np.isnan(y)
 
     # Remove any rows with missing values
-    valid_idx = ~X3.isna().any(axis=1) & ~np.isnan(y)
-    X3_clean = X3[valid_idx]
+    valid_idx = valid_controls & ~np.isnan(simpson)
+    X3_clean = np.column_stack([simpson[valid_idx], controls[valid_idx]])
     y3_clean = y[valid_idx]
 
-    beta3 = np.linalg.lstsq(X3_clean.values, y3_clean, rcond=None)[0]
-    y_pred3 = X3_clean.values @ beta3
-    residuals3 = y3_clean - y_pred3
-    ss_res3 = np.sum(residuals3**2)
-    ss_tot3 = np.sum((y3_clean - np.mean(y3_clean))**2)
+    beta3, ss_res3 = ols(X3_clean, y3_clean)
+    ss_tot3 = total_ss(valid_idx)
     r2_3 = 1 - (ss_res3 / ss_tot3)
 
     print(f"\nIntercept: {beta3[4]:.3f}")
@@ -128,6 +225,11 @@ def run_regressions():
     print(f"R-squared: {r2_3:.3f}")
     print(f"N: {len(y3_clean)} (after removing missing values)")
 
+    boot3 = bootstrap_coefs(X3_clean, y3_clean)
+    ci_low, ci_high = np.percentile(boot3[:, 0], [2.5, 97.5])
+    print(f"Simpson Index 95% bootstrap CI: [{ci_low:.3f}, {ci_high:.3f}] "
+          f"({BOOTSTRAP_RESAMPLES} resamples)")
+
     results.append({
         'model': 'Model 3: + Income + Tenure',
         'simpson_coef': beta3[0],
@@ -140,18 +242,12 @@ def run_regressions():
     print("Model 4: Shannon Index (instead of Simpson)")
     print("=" * 60)
 
-    X4 = df[['shannon_index', 'log_population', 'income_100k', 'owner_share']].copy()
-    X4['intercept'] = 1
-
-    valid_idx4 = ~X4.isna().any(axis=1) & ~np.isnan(y)
-    X4_clean = X4[valid_idx4]
+    valid_idx4 = valid_controls & ~np.isnan(shannon)
+    X4_clean = np.column_stack([shannon[valid_idx4], controls[valid_idx4]])
     y4_clean = y[valid_idx4]
 
-    beta4 = np.linalg.lstsq(X4_clean.values, y4_clean, rcond=None)[0]
-    y_pred4 = X4_clean.values @ beta4
-    residuals4 = y4_clean - y_pred4
-    ss_res4 = np.sum(residuals4**2)
-    ss_tot4 = np.sum((y4_clean - np.mean(y4_clean))**2)
+    beta4, ss_res4 = ols(X4_clean, y4_clean)
+    ss_tot4 = total_ss(valid_idx4)
     r2_4 = 1 - (ss_res4 / ss_tot4)
 
     print(f"\nIntercept: {beta4[4]:.3f}")
@@ -173,18 +269,12 @@ def run_regressions():
     print("Model 5: Foreign-born % (simple measure)")
     print("=" * 60)
 
-    X5 = df[['foreign_born_pct', 'log_population', 'income_100k', 'owner_share']].copy()
-    X5['intercept'] = 1
-
-    valid_idx5 = ~X5.isna().any(axis=1) & ~np.isnan(y)
-    X5_clean = X5[valid_idx5]
+    valid_idx5 = valid_controls & ~np.isnan(foreign_born)
+    X5_clean = np.column_stack([foreign_born[valid_idx5], controls[valid_idx5]])
     y5_clean = y[valid_idx5]
 
-    beta5 = np.linalg.lstsq(X5_clean.values, y5_clean, rcond=None)[0]
-    y_pred5 = X5_clean.values @ beta5
-    residuals5 = y5_clean - y_pred5
-    ss_res5 = np.sum(residuals5**2)
-    ss_tot5 = np.sum((y5_clean - np.mean(y5_clean))**2)
+    beta5, ss_res5 = ols(X5_clean, y5_clean)
+    ss_tot5 = total_ss(valid_idx5)
     r2_5 = 1 - (ss_res5 / ss_tot5)
 
     print(f"\nIntercept: {beta5[4]:.3f}")
@@ -225,7 +315,7 @@ def run_regressions():
     print("\n2. MAGNITUDE")
     print(f"   - Moving from 25th percentile (Simpson=0.20) to 75th (Simpson=0.35)")
     print(f"     is associated with {beta3[0]*0.15:.2f} fewer permits per 1000 dwellings")
-    print(f"   - That's about {(beta3[0]*0.15 / np.mean(y)) * 100:.1f}% of mean permit rate")
+    print(f"   - That's about {(beta3[0]*0.15 / y_mean) * 100:.1f}% of mean permit rate")
 
     print("\n3. TENURE EFFECT IS STRONG")
     print(f"   - Owner share coefficient = {beta3[3]:.3f}")
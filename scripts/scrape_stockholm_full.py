@@ -2,9 +2,28 @@
 Scrape ALL Stockholm permits using a grid approach
 """
 
+import random
 from bygglov_scraper import BygglovScraper
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+# Grid cells scraped concurrently; the scraper's shared rate limiter still
+# spaces every request, so this only overlaps network latency
+CELL_WORKERS = 4
+
+# Cells are scraped in a fixed shuffled order so dense inner-city cells are
+# spread across workers instead of queued together
+CELL_ORDER_SEED = 42
+
+# Cells reporting more permits than this are split into quadrants and
+# rescraped, down to MIN_CELL_DEG, so dense cells are not cut off by the
+# API's marker limit
+MAX_PER_CELL = 500
+MIN_CELL_DEG = 0.0125  # Three splits of a 0.1° cell (~1.4km)
+
+# Densest cells reported at the end
+HOTSPOTS_SHOWN = 5
+
 def scrape_stockholm_complete():
     """
     Scrape all Stockholm region permits by dividing into a fine grid.
@@ -27,40 +46,65 @@ def scrape_stockholm_complete():
     print(f"Grid size: {grid_size}° (~10km cells)")
     print("=" * 60)
 
-    all_permits = []
-    grid_count = 0
-
+    # Build the grid up front so cells can be scraped concurrently
+    cells = []
     lat = stockholm_bbox['lat_min']
     while lat < stockholm_bbox['lat_max']:
         lon = stockholm_bbox['lon_min']
 
         while lon < stockholm_bbox['lon_max']:
-            grid_count += 1
-            lat_max = min(lat + grid_size, stockholm_bbox['lat_max'])
-            lon_max = min(lon + grid_size, stockholm_bbox['lon_max'])
+            cells.append((lat, min(lat + grid_size, stockholm_bbox['lat_max']),
+                          lon, min(lon + grid_size, stockholm_bbox['lon_max'])))
+            lon += grid_size
 
-            print(f"\nGrid cell {grid_count}: lat {lat:.2f}-{lat_max:.2f}, lon {lon:.2f}-{lon_max:.2f}")
+        lat += grid_size
 
-            permits = scraper.scrape_bounding_box(
-                lat, lat_max, lon, lon_max,
-                window=30,
-                types=[0, 1, 2, 3],
-                fetch_details=True
-            )
+    random.Random(CELL_ORDER_SEED).shuffle(cells)
+
+    def scrape_cell(cell):
+        """Scrape one (lat_min, lat_max, lon_min, lon_max) grid cell, refining dense areas."""
+        lat, lat_max, lon, lon_max = cell
+        return scraper.scrape_bounding_box_adaptive(
+            lat, lat_max, lon, lon_max,
+            window=30,
+            types=[0, 1, 2, 3],
+            max_per_cell=MAX_PER_CELL,
+            min_cell_deg=MIN_CELL_DEG,
+            fetch_details=True
+        )
+
+    # Each cell's permits go straight to the CSV, so memory holds one cell
+    # and a crash keeps everything written so far
+    output_file = f"bygglov_stockholm_complete_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    stream, writer = scraper.open_stream(output_file)
+    written = 0
+    cell_counts = []
+
+    with ThreadPoolExecutor(max_workers=CELL_WORKERS) as executor:
+        # map yields in submission order on this thread, so rows are written
+        # by a single writer in the same order on every run
+        for grid_count, (cell, permits) in enumerate(zip(cells, executor.map(scrape_cell, cells)), 1):
+            lat, lat_max, lon, lon_max = cell
+            print(f"\nGrid cell {grid_count}: lat {lat:.2f}-{lat_max:.2f}, lon {lon:.2f}-{lon_max:.2f}")
 
-            all_permits.extend(permits)
-            print(f"Total permits collected so far: {len(all_permits)}")
+            cell_counts.append((len(permits), cell))
+            written += scraper.write_rows(stream, writer, permits)
+            print(f"Cell permits: {len(permits)}, total permits saved so far: {written}")
 
-            lon += grid_size
+    scraper.close_stream(stream)
+    scraper.close()
 
-        lat += grid_size
+    print("\nDensest grid cells:")
+    for count, (lat, lat_max, lon, lon_max) in sorted(cell_counts, reverse=True)[:HOTSPOTS_SHOWN]:
+        print(f"  lat {lat:.2f}-{lat_max:.2f}, lon {lon:.2f}-{lon_max:.2f}: {count} permits")
 
-    # Save results
-    output_file = f"bygglov_stockholm_complete_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-    scraper.save_to_csv(all_permits, output_file)
+    if scraper.failed_cells:
+        print(f"\nWARNING: {len(scraper.failed_cells)} location searches failed; these areas are missing:")
+        for lat, lat_max, lon, lon_max in scraper.failed_cells:
+            print(f"  lat {lat:.4f}-{lat_max:.4f}, lon {lon:.4f}-{lon_max:.4f}")
 
     print("\n" + "=" * 60)
-    print(f"SUCCESS: Scraped {len(all_permits)} permits")
+    print(f"SUCCESS: Scraped {written} permits")
     print(f"Saved to: {output_file}")
     print("=" * 60)
 
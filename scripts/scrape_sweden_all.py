@@ -5,24 +5,27 @@ Scrape ALL of Sweden - complete dataset
 from bygglov_scraper import BygglovScraper
 from datetime import datetime
 
-scraper = BygglovScraper(rate_limit_seconds=1.0)
-
 print("=" * 60)
 print("Scraping ALL of Sweden")
 print("=" * 60)
 
-permits = scraper.scrape_sweden(
-    window=30,
-    types=[0, 1, 2, 3],  # All permit types
-    grid_size=2.0,  # 2 degree cells (faster, should still capture all)
-    fetch_details=True
-)
-
-# Save results
+# Permits are written as each grid cell finishes instead of held in memory
 output_file = f"bygglov_sweden_complete_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-scraper.save_to_csv(permits, output_file)
+with BygglovScraper(rate_limit_seconds=1.0) as scraper:
+    n_permits = scraper.scrape_sweden(
+        window=30,
+        types=[0, 1, 2, 3],  # All permit types
+        grid_size=2.0,  # 2 degree cells (faster, should still capture all)
+        fetch_details=True,
+        output_file=output_file
+    )
+
+if scraper.failed_cells:
+    print(f"\nWARNING: {len(scraper.failed_cells)} location searches failed; these areas are missing:")
+    for lat, lat_max, lon, lon_max in scraper.failed_cells:
+        print(f"  lat {lat:.4f}-{lat_max:.4f}, lon {lon:.4f}-{lon_max:.4f}")
 
 print("\n" + "=" * 60)
-print(f"SUCCESS: Scraped {len(permits)} permits from all of Sweden")
+print(f"SUCCESS: Wrote {n_permits} new permits from all of Sweden")
 print(f"Saved to: {output_file}")
 print("=" * 60)